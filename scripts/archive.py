@@ -0,0 +1,187 @@
+# coding: utf-8
+"""
+Kho HTML tho (content-addressed, nen zstd) de trich xuat lai offline.
+
+    html_archive/
+        index.db                          # SQLite: url, final_url, sha256, fetched_at
+        objects/ab/abcdef....html.zst     # 1 file / noi dung HTML (trung noi dung -> 1 file)
+
+Crawl co ghi kho:   python scripts/crawl.py --archive html_archive
+Trich xuat lai:     python scripts/archive.py reextract --output rows.jsonl [--xlsx out.xlsx]
+                    (extractors.py hien tai, song song tren moi core, khong mang / trinh duyet)
+Can: pip install zstandard
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from extractors import HtmlPage, extract_product, snapshot
+from state_store import now_utc
+
+ARCHIVE_DIR = "html_archive"
+LEVEL = 10
+
+
+class HtmlArchive:
+    """
+    Ket noi SQLite / zstd duoc mo lazy nen object pickle duoc
+    (dung chung cho worker cua chrome_pool / ProcessPoolExecutor).
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self._conn = self._cctx = self._dctx = None
+
+    def __getstate__(self):
+        return {"root": self.root}
+
+    def __setstate__(self, state):
+        self.__init__(state["root"])
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS fetches (
+                    url TEXT NOT NULL,
+                    final_url TEXT,
+                    sha256 TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fetches_url ON fetches (url)")
+            self._conn.commit()
+        return self._conn
+
+    def object_path(self, sha):
+        return os.path.join(self.root, "objects", sha[:2], sha + ".html.zst")
+
+    def put(self, url, html, final_url=None):
+        """Luu HTML (neu chua co) + ghi 1 dong index. Tra ve sha256."""
+        import zstandard
+        data = html.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        path = self.object_path(sha)
+        if not os.path.exists(path):
+            if self._cctx is None: self._cctx = zstandard.ZstdCompressor(level=LEVEL)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(self._cctx.compress(data))
+            os.replace(tmp, path)
+        self.conn.execute("INSERT INTO fetches VALUES (?, ?, ?, ?)", (url, final_url or url, sha, now_utc()))
+        self.conn.commit()
+        return sha
+
+    def get(self, sha):
+        import zstandard
+        if self._dctx is None: self._dctx = zstandard.ZstdDecompressor()
+        with open(self.object_path(sha), "rb") as f:
+            return self._dctx.decompress(f.read()).decode("utf-8")
+
+    def latest(self):
+        """Lan fetch moi nhat cua moi URL: [(url, final_url, sha256)]"""
+        return self.conn.execute("""
+            SELECT url, final_url, sha256 FROM fetches
+            WHERE rowid IN (SELECT MAX(rowid) FROM fetches GROUP BY url)
+            ORDER BY rowid""").fetchall()
+
+    def stats(self):
+        fetches, urls, objects = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT sha256) FROM fetches").fetchone()
+        size = sum(os.path.getsize(os.path.join(d, f))
+                   for d, _, files in os.walk(os.path.join(self.root, "objects")) for f in files)
+        return {"fetches": fetches, "urls": urls, "objects": objects, "bytes": size}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class Archiving:
+    """Boc ham extract (driver, url): luu page_source vao kho roi trich xuat tren cung snapshot"""
+
+    def __init__(self, extract, archive):
+        self.extract = extract
+        self.archive = archive
+
+    def __call__(self, driver, url):
+        page = snapshot(driver)
+        self.archive.put(url, page.page_source, page.current_url)
+        # extractor JS can driver that, extractor snapshot dung luon trang da parse
+        return self.extract(page if self.extract is extract_product else driver, url)
+
+
+# ===== TRICH XUAT LAI =====
+_archive = None
+
+
+def _extract_one(job):
+    """Chay trong tien trinh con: (root, url, final_url, sha) -> (url, row, error)"""
+    global _archive
+    root, url, final_url, sha = job
+    if _archive is None: _archive = HtmlArchive(root)
+    try:
+        return url, extract_product(HtmlPage(_archive.get(sha), base_url=final_url), url), None
+    except Exception as e:
+        return url, None, str(e)
+
+
+def reextract(root=ARCHIVE_DIR, on_done=None, workers=None):
+    """Trich xuat lai lan fetch moi nhat cua moi URL. Tra ve (so row, errors)."""
+    archive = HtmlArchive(root)
+    jobs = [(root, url, final_url, sha) for url, final_url, sha in archive.latest()]
+    archive.close()
+    n_rows, errors = 0, []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for url, row, error in pool.map(_extract_one, jobs, chunksize=32):
+            if row is not None:
+                n_rows += 1
+            else:
+                errors.append({"url": url, "error": error})
+            if on_done: on_done(url, row, error)
+    return n_rows, errors
+
+
+def main():
+    from sinks import open_sink, to_xlsx
+
+    parser = argparse.ArgumentParser(description="Kho HTML + trich xuat lai offline")
+    parser.add_argument("--archive", default=ARCHIVE_DIR)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("reextract", help="chay extractors.py hien tai tren toan bo kho")
+    p.add_argument("--output", default="vuadocau_reextract.jsonl", help=".jsonl / .csv / .parquet")
+    p.add_argument("--xlsx", help="chuyen them sang file xlsx")
+    p.add_argument("--workers", type=int, default=os.cpu_count())
+    sub.add_parser("stats", help="so URL / file / dung luong kho")
+    args = parser.parse_args()
+
+    if args.cmd == "stats":
+        s = HtmlArchive(args.archive).stats()
+        print(f"{s['urls']} URL, {s['fetches']} lan fetch, {s['objects']} file, {s['bytes'] / 1024 / 1024:.1f} MB")
+        return
+
+    start = time.time()
+    sink = open_sink(args.output)
+
+    def on_done(url, row=None, error=None):
+        if row is not None: sink.write(row)
+
+    try:
+        n_rows, errors = reextract(args.archive, on_done, args.workers)
+    finally:
+        sink.close()
+    if args.xlsx: to_xlsx(args.output, args.xlsx)
+    print(f"Trich xuat lai {n_rows} san pham, loi: {len(errors)}, {time.time() - start:.1f}s -> {args.output}")
+    for err in errors[:5]: print(f"  - {err['url'][:55]}: {err['error'][:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# coding: utf-8
+"""
+Engine asyncio cho BUOC 2: nhieu request cung luc (--concurrency),
+co gioi han toc do theo tung host (token bucket).
+
+Thoi gian chay ~ so san pham / concurrency thay vi ~ so san pham * 3 giay.
+
+AimdController (mac dinh trong crawl.py --mode async) tu dieu chinh so request
+dang chay: tang dan khi p95 latency < target va khong co 429/5xx/timeout,
+giam theo cap so nhan khi co.
+
+    python scripts/async_crawl.py      # kiem tra AimdController dung lai qua nhieu asyncio.run
+"""
+
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from extractors import HtmlPage, extract_product
+from http_fetch import HEADERS, TIMEOUT, needs_browser
+from metrics import METRICS, percentile
+from retry import classify
+
+CONCURRENCY = 8
+RATE = 5.0  # request/giay cho moi host
+MAX_CONCURRENCY = 32
+TARGET_P95 = 2.0  # giay
+WINDOW = 2.0  # giay, moi cua so quyet dinh tang / giam 1 lan
+BACKOFF = 0.5
+
+
+# ===== RATE LIMIT =====
+class TokenBucket:
+    """Moi request lay 1 token; token hoi lai voi toc do `rate`/giay, toi da `burst`"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    def __init__(self, rate, burst=None):
+        self.rate, self.burst = rate, burst
+        self.buckets = {}
+
+    async def acquire(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        await self.buckets[host].acquire()
+
+
+# ===== ADAPTIVE CONCURRENCY (AIMD) =====
+def is_congestion(exc):
+    """429 / 5xx / timeout / mat ket noi -> server dang qua tai"""
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+class AimdController:
+    def __init__(self, start=CONCURRENCY, max_limit=MAX_CONCURRENCY, target_p95=TARGET_P95, min_limit=1):
+        self.limit = max(min_limit, min(start, max_limit))
+        self.min_limit, self.max_limit = min_limit, max_limit
+        self.target_p95 = target_p95
+        self.in_flight = 0
+        self.last_p95 = 0.0
+        self.latencies, self.congested = [], 0
+        self.window_start = time.monotonic()
+        self.history = []  # (giay tu luc bat dau, limit, p95, so loi) moi cua so
+        self.started = self.window_start
+        self._cond = self._loop = None
+
+    def _condition(self):
+        """
+        Condition gan voi event loop dang chay. Moi asyncio.run (vd vong thu lai cua crawl.py) tao cai moi,
+        chi limit / cua so latency duoc giu qua cac lan chay.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._cond, self._loop, self.in_flight = asyncio.Condition(), loop, 0
+        return self._cond
+
+    async def acquire(self):
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self):
+        cond = self._condition()
+        async with cond:
+            self.in_flight -= 1
+            cond.notify_all()
+
+    def observe(self, seconds, status=200):
+        self.latencies.append(seconds)
+        if status == 429 or status >= 500: self.congested += 1
+        self._adjust()
+
+    def observe_error(self, exc):
+        if is_congestion(exc):
+            self.congested += 1
+            self._adjust()
+
+    def _adjust(self):
+        now = time.monotonic()
+        if now - self.window_start < WINDOW: return
+        self.last_p95 = percentile(self.latencies, 95)
+        if self.congested or self.last_p95 > self.target_p95:
+            self.limit = max(self.min_limit, int(self.limit * BACKOFF))
+        elif self.limit < self.max_limit:
+            self.limit += 1
+        self.history.append((round(now - self.started, 1), self.limit, round(self.last_p95, 3), self.congested))
+        METRICS.gauge("crawl_concurrency_limit", self.limit)
+        self.latencies, self.congested = [], 0
+        self.window_start = now
+
+    def status(self):
+        return f"song song {self.in_flight}/{self.limit}, p95 {self.last_p95:.2f}s"
+
+    def summary(self):
+        if not self.history: return f"Concurrency: {self.limit} (chua du 1 cua so {WINDOW}s)"
+        tail = [limit for _, limit, _, _ in self.history[-10:]]
+        return (f"Concurrency: on dinh ~{sorted(tail)[len(tail) // 2]} (min {min(h[1] for h in self.history)}, "
+                f"max {max(h[1] for h in self.history)}), "
+                f"giam {sum(1 for h in self.history if h[3])} lan do 429/5xx/timeout")
+
+
+# ===== FETCH =====
+async def fetch_page(session, limiter, url):
+    await limiter.acquire(url)
+    async with session.get(url) as resp:
+        resp.raise_for_status()
+        return HtmlPage(await resp.text(), base_url=str(resp.url))
+
+
+async def scrape_one(session, limiter, url, state=None, archive=None, controller=None, conditional=True):
+    """Tra ve (row, kind): kind = "http", "cached" hoac "browser" (row None, can Selenium)"""
+    await limiter.acquire(url)
+    headers = state.conditional_headers(url) if state is not None and conditional else {}
+    start = time.perf_counter()
+    async with session.get(url, headers=headers) as resp:
+        if resp.status == 304 and state is not None:
+            if controller is not None: controller.observe(time.perf_counter() - start, resp.status)
+            row = state.carry_forward(url)
+            if row is not None: return row, "cached"
+            # 304 nhung chua luu row: tai lai khong dieu kien, van giu state de luu row + ETag moi
+            return await scrape_one(session, limiter, url, state, archive, controller, conditional=False)
+        resp.raise_for_status()  # 429 / 5xx -> controller.observe_error o worker
+        body = await resp.read()
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        text = body.decode(resp.get_encoding(), errors="replace")
+        final_url = str(resp.url)
+    if controller is not None: controller.observe(time.perf_counter() - start, resp.status)
+    METRICS.observe("fetch", time.perf_counter() - start, url)
+    METRICS.inc("bytes", len(body), url, stage="fetch")
+
+    if state is not None and state.is_same_body(url, body):
+        return state.carry_forward(url, "same_body", etag, last_modified), "cached"
+    page = HtmlPage(text, base_url=final_url)
+    if needs_browser(page): return None, "browser"
+    row = extract_product(page, url)
+    if archive is not None: archive.put(url, text, final_url)
+    if state is not None: state.save(url, row, body, etag, last_modified)
+    return row, "http"
+
+
+async def _crawl(urls, concurrency, rate, on_done, state=None, keep_rows=True, archive=None, controller=None,
+                 deadline=None):
+    rows, errors, browser_urls = [], [], []
+    kinds = Counter()
+    limiter = HostRateLimiter(rate)
+    queue = asyncio.Queue()
+    for url in urls: queue.put_nowait(url)
+
+    async def worker(session):
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            row = error = None
+            if controller is not None: await controller.acquire()
+            try:
+                row, kind = await scrape_one(session, limiter, url, state, archive, controller)
+                kinds[kind] += 1
+                if kind == "browser":
+                    browser_urls.append(url)
+                elif keep_rows:
+                    rows.append(row)
+            except Exception as e:
+                error = str(e)
+                errors.append({"url": url, "error": error, "kind": classify(e)})
+                METRICS.error("detail", e, url)
+                if controller is not None: controller.observe_error(e)
+            finally:
+                if controller is not None: await controller.release()
+            if on_done: on_done(url, row, error)
+
+    # Co controller: du worker cho muc toi da, controller quyet dinh bao nhieu request chay that
+    workers = max(concurrency, controller.max_limit) if controller is not None else concurrency
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=workers)
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout, connector=connector) as session:
+        await asyncio.gather(*(worker(session) for _ in range(workers)))
+    return rows, errors, browser_urls, kinds
+
+
+def crawl_products(urls, concurrency=CONCURRENCY, rate=RATE, on_done=None, state=None, keep_rows=True,
+                   archive=None, controller=None, deadline=None):
+    """
+    Cao chi tiet song song. Tra ve (rows, errors, browser_urls, kinds):
+    browser_urls la cac trang can JavaScript, de Selenium xu ly sau.
+    kinds: Counter so trang "http" / "cached" / "browser".
+    state: StateStore (tuy chon) de gui conditional GET.
+    keep_rows=False: khong giu rows, chi chuyen qua on_done (sink ghi thang xuong file).
+    archive: HtmlArchive (tuy chon) luu HTML tung trang.
+    controller: AimdController -> so request dong thoi tu dieu chinh (concurrency chi la muc khoi dau).
+    deadline: moc time.monotonic(), qua moc thi khong lay URL moi (URL con lai khong co trong ket qua).
+    """
+    return asyncio.run(_crawl(urls, concurrency, rate, on_done, state, keep_rows, archive, controller, deadline))
+
+
+# ===== KIEM TRA =====
+def check_controller_reuse(runs=2, jobs=8):
+    """
+    1 AimdController dung qua nhieu asyncio.run (nhu crawl.py: luot chinh + cac vong thu lai),
+    so job > limit de co tranh chap. Loi "bound to a different event loop" -> raise.
+    """
+    controller = AimdController(start=1, max_limit=2)
+
+    async def run():
+        async def job():
+            await controller.acquire()
+            await asyncio.sleep(0.01)
+            await controller.release()
+        await asyncio.gather(*(job() for _ in range(jobs)))
+
+    for _ in range(runs): asyncio.run(run())
+    assert controller.in_flight == 0, controller.in_flight
+    return controller
+
+
+if __name__ == "__main__":
+    check_controller_reuse()
+    print("AimdController: dung lai qua nhieu event loop OK")
@@ -0,0 +1,220 @@
+# coding: utf-8
+"""
+Benchmark extractor tren bo trang mau (bench/pages/*.html).
+
+Do thoi gian tung extractor tren tung trang (median / min cua --repeat lan),
+so ket qua voi gia tri chuan trong bench/golden.json va ghi report JSON.
+Exit code 1 neu co extractor sai ket qua (hoac cham hon --baseline qua --max-slowdown lan).
+
+    python scripts/bench.py                          # -> bench_report.json
+    python scripts/bench.py --baseline old.json      # so toc do voi report truoc
+    python scripts/bench.py --update-golden          # ghi lai golden tu extractor hien tai (xem diff truoc khi commit)
+    python scripts/bench.py --record URL ten_trang   # luu them 1 trang that vao bo mau
+    python scripts/bench.py --js                     # extractor JS (Chrome headless) phai ra row giong Python
+
+Bo trang hien tai la HTML tong hop (viet theo cau truc extractor doc, khong chup tu site):
+chi la smoke test toc do / hoi quy, khong do do chinh xac tren giao dien that. Thay bang --record khi vao duoc site.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from selenium.webdriver.common.by import By
+
+from extractors import (HtmlPage, extract_product, get_color_group, get_first_comment, get_image_url,
+                        get_rating, get_size_price_raw, get_sold_count)
+
+BENCH_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+PAGES_DIR = os.path.join(BENCH_DIR, "pages")
+GOLDEN_FILE = os.path.join(BENCH_DIR, "golden.json")
+REPORT_FILE = "bench_report.json"
+REPEAT = 20
+MAX_SLOWDOWN = 1.5
+
+
+def _listing_extractors():
+    from discovery import last_page_number, page_links
+    return {"page_links": page_links, "last_page_number": last_page_number}
+
+
+PRODUCT_EXTRACTORS = {
+    "get_size_price_raw": get_size_price_raw,
+    "get_color_group": get_color_group,
+    "get_sold_count": get_sold_count,
+    "get_rating": get_rating,
+    "get_first_comment": get_first_comment,
+    "get_image_url": get_image_url,
+    "extract_product": lambda page: extract_product(page, page.current_url),
+}
+
+
+def extractors_for(kind):
+    return _listing_extractors() if kind == "listing" else PRODUCT_EXTRACTORS
+
+
+def normalize(value):
+    """tuple -> list, giong gia tri doc tu golden.json"""
+    return json.loads(json.dumps(value, ensure_ascii=False))
+
+
+def timed(fn, arg, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        times.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(times), min(times)
+
+
+def load_page(name, meta):
+    return HtmlPage.from_file(os.path.join(PAGES_DIR, name), base_url=meta["url"])
+
+
+# ===== CHAY BENCHMARK =====
+def run(golden, repeat=REPEAT):
+    pages, failed = [], 0
+    for name, meta in golden.items():
+        _, parse_ms, _ = timed(lambda n: load_page(n, meta), name, repeat)
+        page = load_page(name, meta)
+        result = {"page": name, "kind": meta["kind"], "parse_ms": round(parse_ms, 3), "extractors": {}}
+        for fn_name, fn in extractors_for(meta["kind"]).items():
+            got, median_ms, min_ms = timed(fn, page, repeat)
+            got = normalize(got)
+            expected = meta["expected"].get(fn_name)
+            ok = fn_name not in meta["expected"] or got == expected
+            if not ok: failed += 1
+            result["extractors"][fn_name] = {"median_ms": round(median_ms, 3), "min_ms": round(min_ms, 3),
+                                             "ok": ok, "got": got, "expected": expected}
+        pages.append(result)
+    return pages, failed
+
+
+def summarize(pages):
+    """Tong median (ms) cua moi extractor tren ca bo trang"""
+    totals = {}
+    for page in pages:
+        for fn_name, res in page["extractors"].items():
+            totals[fn_name] = totals.get(fn_name, 0) + res["median_ms"]
+    return {fn_name: round(ms, 3) for fn_name, ms in totals.items()}
+
+
+def compare(totals, baseline_file, max_slowdown):
+    with open(baseline_file, encoding="utf-8") as f:
+        old = json.load(f)["summary"]["total_median_ms"]
+    slower = {}
+    for fn_name, ms in totals.items():
+        if old.get(fn_name) and ms > old[fn_name] * max_slowdown:
+            slower[fn_name] = {"before_ms": old[fn_name], "after_ms": ms, "ratio": round(ms / old[fn_name], 2)}
+    return slower
+
+
+def update_golden(golden):
+    for name, meta in golden.items():
+        page = load_page(name, meta)
+        meta["expected"] = {fn_name: normalize(fn(page)) for fn_name, fn in extractors_for(meta["kind"]).items()}
+    save_golden(golden)
+    print(f"Da ghi lai {GOLDEN_FILE} ({len(golden)} trang) - kiem tra git diff truoc khi commit")
+
+
+def record(url, name, golden):
+    from http_fetch import make_session, fetch_page
+    page = fetch_page(make_session(), url)
+    kind = "listing" if page.find_elements(By.CSS_SELECTOR, "li.product") and not page.find_elements(
+        By.CSS_SELECTOR, "form.variations_form, p.price") else "product"
+    name = name if name.endswith(".html") else name + ".html"
+    with open(os.path.join(PAGES_DIR, name), "w", encoding="utf-8") as f:
+        f.write(page.page_source)
+    golden[name] = {"url": url, "kind": kind, "expected": {}}
+    update_golden(golden)
+
+
+# ===== SO EXTRACTOR JS =====
+def check_js(golden):
+    """Mo tung trang san pham mau trong Chrome headless, so extract_product_js voi extract_product. Tra ve so trang lech."""
+    from browser import make_driver
+    from js_extract import extract_product_js
+
+    driver = make_driver(headless=True)
+    diffs = 0
+    try:
+        for name, meta in golden.items():
+            if meta["kind"] != "product": continue
+            driver.get(pathlib.Path(PAGES_DIR, name).as_uri())
+            # link tuong doi resolve theo URL that, giong HtmlPage(base_url=...)
+            driver.execute_script("var b = document.createElement('base'); b.href = arguments[0]; "
+                                  "document.head.prepend(b);", meta["url"])
+            got = normalize(extract_product_js(driver, meta["url"]))
+            expected = normalize(extract_product(load_page(name, meta), meta["url"]))
+            fields = [key for key in expected if got.get(key) != expected[key]]
+            if fields: diffs += 1
+            print(f"{name[:30]:<30} " + ("ok" if not fields else
+                                        "LECH: " + ", ".join(f"{k}={got.get(k)!r} != {expected[k]!r}" for k in fields)))
+    finally:
+        driver.quit()
+    return diffs
+
+
+def load_golden():
+    with open(GOLDEN_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_golden(golden):
+    with open(GOLDEN_FILE, "w", encoding="utf-8") as f:
+        json.dump(golden, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extractor tren bo trang mau")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--baseline", help="report JSON cu de so toc do")
+    parser.add_argument("--max-slowdown", type=float, default=MAX_SLOWDOWN)
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--record", nargs=2, metavar=("URL", "NAME"))
+    parser.add_argument("--js", action="store_true", help="so extractor JS voi Python tren bo trang (can Chrome)")
+    args = parser.parse_args()
+
+    golden = load_golden()
+    if args.record: return record(args.record[0], args.record[1], golden)
+    if args.update_golden: return update_golden(golden)
+    if args.js:
+        diffs = check_js(golden)
+        print(f"\nExtractor JS lech {diffs} trang")
+        if diffs: sys.exit(1)
+        return
+
+    pages, failed = run(golden, args.repeat)
+    totals = summarize(pages)
+    slower = compare(totals, args.baseline, args.max_slowdown) if args.baseline else {}
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(), "repeat": args.repeat,
+        "summary": {"pages": len(pages), "checks": sum(len(p["extractors"]) for p in pages),
+                    "failed": failed, "total_median_ms": totals, "slower": slower},
+        "pages": pages,
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"{'trang':<30} {'extractor':<20} {'median ms':>10} {'min ms':>8}  ket qua")
+    for page in pages:
+        for fn_name, res in page["extractors"].items():
+            status = "ok" if res["ok"] else f"SAI: {res['got']!r} != {res['expected']!r}"
+            print(f"{page['page'][:30]:<30} {fn_name:<20} {res['median_ms']:>10.3f} {res['min_ms']:>8.3f}  {status}")
+    print(f"\n{report['summary']['checks']} kiem tra, sai: {failed}. Report: {args.report}")
+    for fn_name, s in slower.items():
+        print(f"  CHAM HON: {fn_name} {s['before_ms']} -> {s['after_ms']} ms (x{s['ratio']})")
+    if failed or slower: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# coding: utf-8
+"""
+Tao Chrome driver dung chung cho cac script crawl.
+
+Profile "lean" (crawl.py --lean): headless, page load strategy eager, chan anh / font /
+media va cac domain tracking, chat widget. Extractor chi doc HTML va thuoc tinh src
+nen khong can tai cac file nay.
+
+So sanh bytes tai ve cho moi trang giua profile thuong va lean:
+    python scripts/browser.py https://vuadocau.com/san-pham/... [URL ...]
+"""
+
+import argparse
+import json
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+# Chan qua CDP Network.setBlockedURLs (ho tro wildcard *)
+BLOCKED_FILES = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.ico",
+                 "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+                 "*.mp4", "*.webm", "*.mp3", "*.ogg"]
+BLOCKED_DOMAINS = ["*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+                   "*connect.facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*",
+                   "*tawk.to*", "*subiz*", "*fchat.vn*", "*sp.zalo.me*", "*zalo.me/sdk*",
+                   "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*youtube.com/embed*"]
+LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.managed_default_content_settings.notifications": 2,
+    "profile.managed_default_content_settings.geolocation": 2,
+}
+
+
+def make_options(headless=False, lean=False, measure=False):
+    options = Options()
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+    if lean:
+        # eager: get() tra ve khi DOMContentLoaded, khong doi anh / iframe
+        options.page_load_strategy = "eager"
+        options.add_experimental_option("prefs", LEAN_PREFS)
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--mute-audio")
+    if measure:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def make_driver(headless=False, lean=False, measure=False):
+    driver = webdriver.Chrome(options=make_options(headless, lean, measure))
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_FILES + BLOCKED_DOMAINS})
+    return driver
+
+
+def page_bytes(driver):
+    """
+    Tong bytes (da nen, qua mang) tu lan goi truoc den gio.
+    Can driver tao voi measure=True; get_log xoa buffer nen goi 1 lan sau moi trang.
+    """
+    total = requests = 0
+    for entry in driver.get_log("performance"):
+        msg = json.loads(entry["message"])["message"]
+        if msg["method"] == "Network.loadingFinished":
+            total += msg["params"].get("encodedDataLength", 0)
+            requests += 1
+    return total, requests
+
+
+class LazyDriver:
+    """Chi mo Chrome o lan goi dau tien (khi that su can trinh duyet)"""
+
+    def __init__(self, headless=False, lean=False):
+        self.headless = headless
+        self.lean = lean
+        self.driver = None
+
+    def __call__(self):
+        if self.driver is None:
+            self.driver = make_driver(self.headless, self.lean)
+        return self.driver
+
+    def quit(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+# ===== SO SANH PROFILE =====
+def measure_profile(urls, lean):
+    from waits import get_ready
+    driver = make_driver(headless=True, lean=lean, measure=True)
+    results = []
+    try:
+        for url in urls:
+            page_bytes(driver)  # bo log cua trang truoc
+            start = time.time()
+            get_ready(driver, url)
+            elapsed = time.time() - start
+            time.sleep(1)  # cho request con dang chay ghi xong log
+            total, n = page_bytes(driver)
+            results.append((url, total, n, elapsed))
+    finally:
+        driver.quit()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="So sanh bytes tai ve: profile thuong vs lean")
+    parser.add_argument("urls", nargs="+")
+    args = parser.parse_args()
+
+    normal, lean = measure_profile(args.urls, False), measure_profile(args.urls, True)
+    print(f"{'URL':<50} {'thuong':>12} {'lean':>12} {'giam':>6} {'t thuong':>9} {'t lean':>7}")
+    for (url, b0, n0, t0), (_, b1, n1, t1) in zip(normal, lean):
+        saved = (1 - b1 / b0) * 100 if b0 else 0
+        print(f"{url[-50:]:<50} {b0 / 1024:>8.0f} KB {b1 / 1024:>8.0f} KB {saved:>5.0f}% {t0:>8.2f}s {t1:>6.2f}s"
+              f"  ({n0} -> {n1} request)")
+    b0, b1 = sum(r[1] for r in normal), sum(r[1] for r in lean)
+    print(f"\nTrung binh / trang: {b0 / len(normal) / 1024:.0f} KB -> {b1 / len(lean) / 1024:.0f} KB"
+          f" ({(1 - b1 / b0) * 100 if b0 else 0:.0f}% it hon)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# coding: utf-8
+"""
+Chuan hoa URL san pham truoc khi xep hang doi BUOC 2.
+
+Cac URL chi khac nhau o dau "/" cuoi, chu hoa / thuong cua host, cach percent-encode,
+#fragment, tham so tracking (utm_*, fbclid...) hay tham so bien the WooCommerce
+(attribute_pa_size=..., variation_id...) deu la cung 1 trang san pham -> chi cao 1 lan.
+
+    canonical_url("HTTPS://Vuadocau.com/can-cau-abc?attribute_pa_size=3m6&utm_source=fb#tab")
+    -> "https://vuadocau.com/can-cau-abc/"
+"""
+
+import re
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+from metrics import METRICS
+
+# Tham so bo di: tracking + chon bien the / gio hang (cung 1 trang san pham)
+DROP_PARAMS = {"fbclid", "gclid", "gbraid", "wbraid", "msclkid", "zarsrc", "srsltid", "ref", "_ga", "_gl",
+               "mc_cid", "mc_eid", "variation_id", "add-to-cart", "quantity", "product_id"}
+DROP_PREFIXES = ("utm_", "attribute_")
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+_ESCAPE = re.compile(r"%[0-9A-F]{2}")
+
+
+def _keep_param(name):
+    name = name.lower()
+    return name not in DROP_PARAMS and not name.startswith(DROP_PREFIXES)
+
+
+def _path(path):
+    # decode roi encode lai 1 kieu, hex viet thuong nhu link WordPress tu sinh
+    path = quote(unquote(path), safe="/:@!$&'()*+,;=~-._")
+    path = _ESCAPE.sub(lambda m: m.group(0).lower(), path)
+    path = re.sub(r"/{2,}", "/", path) or "/"
+    last = path.rsplit("/", 1)[-1]
+    if not path.endswith("/") and "." not in last: path += "/"  # permalink WordPress luon co "/" cuoi
+    return path
+
+
+def canonical_url(url):
+    """URL san pham -> dang chuan (khong doi URL khong phai http / https)"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS: return url.strip()
+    host = (parts.hostname or "").lower()
+    if parts.port and str(parts.port) != DEFAULT_PORTS[scheme]: host += f":{parts.port}"
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if _keep_param(k)))
+    return urlunsplit((scheme, host, _path(parts.path), query, ""))
+
+
+def dedup_urls(urls, stage="detail"):
+    """
+    Chuan hoa + bo trung, giu thu tu xuat hien dau tien.
+    Tra ve (urls, so lan fetch trung da tranh duoc).
+    """
+    urls = list(urls)
+    unique = list(dict.fromkeys(canonical_url(url) for url in urls))
+    skipped = len(urls) - len(unique)
+    if skipped: METRICS.inc("duplicates_skipped", skipped, stage=stage)
+    return unique, skipped
@@ -0,0 +1,174 @@
+# coding: utf-8
+"""
+Pool N tien trinh, moi tien trinh 1 Chrome headless, cho cac trang can trinh duyet.
+
+Worker chay extract_product va gui row ve 1 collector duy nhat (tien trinh chinh),
+collector gom rows + errors. Worker chet (Chrome crash, het RAM...) duoc khoi dong
+lai, URL dang xu ly duoc tra ve hang doi thay vi lam hong ca lan chay.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import Counter
+
+from selenium.common.exceptions import WebDriverException
+
+from browser import make_driver
+from extractors import extract_product
+from metrics import METRICS
+from retry import classify
+from waits import get_ready
+
+WORKERS = max(1, (os.cpu_count() or 2) - 1)
+MAX_ATTEMPTS = 3  # 1 URL lam chet worker qua so lan nay -> ghi vao errors
+
+# Loi WebDriver nghia la Chrome da chet, can mo lai driver moi
+DEAD_BROWSER_MARKERS = ("invalid session id", "chrome not reachable", "disconnected",
+                        "session deleted", "no such window", "target window already closed")
+
+
+def _browser_dead(exc):
+    msg = str(exc).lower()
+    return isinstance(exc, WebDriverException) and any(m in msg for m in DEAD_BROWSER_MARKERS)
+
+
+# ===== WORKER (tien trinh con) =====
+def _worker(worker_id, tasks, results, headless, extract=extract_product, lean=False):
+    driver = None
+    try:
+        while True:
+            url = tasks.get()
+            if url is None: break
+            results.put(("start", worker_id, url, None, None))
+            try:
+                if driver is None: driver = make_driver(headless, lean)
+                waited = get_ready(driver, url)
+                results.put(("row", worker_id, url, extract(driver, url), waited))
+            except Exception as e:
+                # phan loai o day: chi tien trinh con co exception that (ca MRO), collector chi nhan ten
+                results.put(("error", worker_id, url, str(e), (type(e).__name__, classify(e))))
+                if _browser_dead(e):
+                    try:
+                        driver.quit()
+                    except:
+                        pass
+                    driver = None
+    finally:
+        if driver is not None:
+            try:
+                driver.quit()
+            except:
+                pass
+
+
+# ===== COLLECTOR (tien trinh chinh) =====
+class ChromePool:
+    """
+    Cac tien trinh Chrome song qua nhieu lan crawl() (vd cac vong thu lai cua crawl.py),
+    chi khoi dong khi co trang can trinh duyet. Nho close().
+    extract: ham (driver, url) -> row, phai import duoc tu module (vd js_extract.extract_product_js).
+    lean: profile Chrome chan anh / font / media / tracking (browser.make_options).
+    """
+
+    def __init__(self, workers=WORKERS, headless=True, extract=extract_product, lean=False):
+        self.workers, self.headless, self.extract, self.lean = workers, headless, extract, lean
+        self.ctx = mp.get_context("spawn")
+        self.tasks = self.results = None
+        self.procs = {}
+        self.restarts = 0
+
+    def _start(self, worker_id):
+        p = self.ctx.Process(target=_worker, daemon=True, args=(worker_id, self.tasks, self.results,
+                                                                self.headless, self.extract, self.lean))
+        p.start()
+        self.procs[worker_id] = p
+
+    def _drain(self):
+        """Bo cac URL chua worker nao nhan (het thoi gian). Tra ve so URL da bo."""
+        n = 0
+        while True:
+            try:
+                self.tasks.get_nowait()
+            except queue.Empty:
+                return n
+            n += 1
+
+    def crawl(self, urls, on_done=None, wait_log=None, keep_rows=True, deadline=None):
+        """
+        Tra ve (rows, errors). deadline (time.monotonic): qua moc nay thi khong giao URL moi,
+        URL chua giao khong co trong rows / errors.
+        """
+        if self.tasks is None: self.tasks, self.results = self.ctx.Queue(), self.ctx.Queue()
+        for url in urls: self.tasks.put(url)
+        for i in range(len(self.procs), min(self.workers, len(self.procs) + len(urls))): self._start(i)
+        in_flight, attempts = {}, Counter()
+        rows, errors = [], []
+        pending, expired = len(urls), False
+
+        def finish(url, row=None, error=None):
+            nonlocal pending
+            pending -= 1
+            if on_done: on_done(url, row, error)
+
+        while pending:
+            if deadline is not None and not expired and time.monotonic() >= deadline:
+                expired = True
+                pending -= self._drain()
+                if not pending: break
+            try:
+                kind, worker_id, url, payload, waited = self.results.get(timeout=1)
+            except queue.Empty:
+                # Hang doi rong -> kiem tra worker nao da chet
+                for worker_id, p in list(self.procs.items()):
+                    if p.is_alive(): continue
+                    url = in_flight.pop(worker_id, None)
+                    if url:
+                        attempts[url] += 1
+                        if attempts[url] < MAX_ATTEMPTS and not expired:
+                            self.tasks.put(url)
+                            METRICS.inc("retries", url=url, stage="pool")
+                        else:
+                            error = f"worker chet {attempts[url]} lan"
+                            errors.append({"url": url, "error": error, "kind": classify("WorkerDied")})
+                            METRICS.error("detail", "WorkerDied", url)
+                            finish(url, error=error)
+                    print(f"  Worker {worker_id} chet (exit {p.exitcode}) -> khoi dong lai")
+                    self._start(worker_id)
+                    self.restarts += 1
+                continue
+
+            if kind == "start":
+                in_flight[worker_id] = url
+                continue
+            in_flight.pop(worker_id, None)
+            if kind == "row":
+                if keep_rows: rows.append(payload)
+                if wait_log is not None: wait_log.add(url, waited)
+                METRICS.observe("wait", waited, url)
+                finish(url, row=payload)
+            else:
+                name, err_kind = waited  # tien trinh con gui (ten loai exception, transient / permanent)
+                errors.append({"url": url, "error": payload, "kind": err_kind})
+                METRICS.error("detail", name, url)
+                finish(url, error=payload)
+        return rows, errors
+
+    def close(self):
+        for _ in self.procs: self.tasks.put(None)
+        for p in self.procs.values():
+            p.join(timeout=10)
+            if p.is_alive(): p.terminate()
+        self.procs = {}
+
+
+def crawl_products(urls, workers=WORKERS, headless=True, on_done=None, wait_log=None, keep_rows=True,
+                   extract=extract_product, lean=False, deadline=None):
+    """1 lan crawl voi pool rieng. Tra ve (rows, errors, restarts)."""
+    pool = ChromePool(workers, headless, extract, lean)
+    try:
+        rows, errors = pool.crawl(urls, on_done, wait_log, keep_rows, deadline)
+    finally:
+        pool.close()
+    return rows, errors, pool.restarts
@@ -0,0 +1,553 @@
+# coding: utf-8
+"""
+Vuadocau.com crawler - ban HTTP (requests + lxml), Selenium chi la fallback.
+
+    python scripts/crawl.py                      # mode http (mac dinh)
+    python scripts/crawl.py --mode selenium      # giong final-craw.py
+    python scripts/crawl.py --mode selenium --limit 10   # giong 10product.py
+    python -m vuadocau --mode async --limit 50    # cung CLI, chay tu thu muc scripts/
+    python scripts/crawl.py --mode async --concurrency 16 --rate 8
+    python scripts/crawl.py --mode async --max-concurrency 48 --target-p95 1.5   # AIMD tu dieu chinh song song
+    python scripts/crawl.py --mode api           # WooCommerce Store API (JSON)
+    python scripts/crawl.py --discovery sitemap --changed-only   # chi cao san pham co lastmod moi
+    python scripts/crawl.py --incremental        # conditional GET, dung lai row khong doi
+    python scripts/crawl.py --mode async --schedule --budget-minutes 10   # san pham quan trong nhat truoc
+    python scripts/crawl.py --resume             # chay tiep tu crawl_journal.jsonl sau khi crash
+    python scripts/crawl.py --retry-from vuadocau_..._errors.jsonl   # chi cao lai URL loi cua lan truoc
+    python scripts/crawl.py --mode pool --extractor js   # 1 lan execute_script cho moi san pham
+    python scripts/crawl.py --mode selenium --lean       # Chrome headless, khong tai anh / font / tracking
+    python scripts/crawl.py --archive html_archive   # luu HTML (zstd) de archive.py reextract offline
+    python scripts/crawl.py --metrics metrics.jsonl   # metrics tung stage + metrics.prom (Prometheus textfile)
+    python scripts/crawl.py --sink out.jsonl --xlsx   # ghi tung batch, xlsx chi la buoc chuyen doi cuoi
+    python scripts/crawl.py --sink out.jsonl --images   # tai anh song song, kho image_cache/ (images.py)
+    python scripts/crawl.py --reviews            # them BUOC 4: toan bo danh gia -> reviews.db (reviews.py)
+    python scripts/crawl.py --base-url http://localhost:8000/shop/   # test voi server local
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import chrome_pool
+from archive import Archiving, HtmlArchive
+import store_api
+from async_crawl import CONCURRENCY, MAX_CONCURRENCY, RATE, TARGET_P95, AimdController, crawl_products
+from browser import LazyDriver
+from canonical import dedup_urls
+from discovery import discover_links
+from sitemap import FRONTIER_DB, Frontier, discover_from_sitemap
+from state_store import STATE_DB, StateStore, now_utc
+from extractors import COLUMNS, clean_excel, extract_product
+from http_fetch import make_session, scrape_product
+from images import IMAGE_COLUMNS, IMAGE_DIR, THUMB_SIZE, ImagePipeline
+from js_extract import extract_product_js
+from rules import ENGINE
+from journal import JOURNAL_FILE, Journal, load as load_journal, pending
+from metrics import METRICS
+from reviews import REVIEWS_DB, harvest_reviews
+from retry import MAX_ATTEMPTS, RetryQueue, classify, load_errors, save_errors
+from scheduler import plan
+from sinks import iter_rows, open_sink, to_xlsx
+from waits import WaitLog, get_ready
+
+# ===== CONFIG =====
+BASE_URL = "https://vuadocau.com/shop/"
+OUTPUT_FILE = f"vuadocau_ALL_products_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+# Cach trich xuat tren trang Selenium: snapshot HTML (lxml) hoac 1 lan execute_script
+EXTRACTORS = {"snapshot": extract_product, "js": extract_product_js}
+
+
+# ===== GHI KET QUA =====
+class Recorder:
+    """
+    Nhan tung ket qua ngay khi xu ly xong: ghi journal, ghi sink.
+    Co sink thi cac engine khong giu rows trong RAM (keep_rows = False).
+    Co pipeline anh thi row vao sink sau khi anh tai xong.
+    """
+
+    def __init__(self, journal=None, sink=None, images=None):
+        self.journal = journal
+        self.sink = sink
+        self.images = images
+        self.done_urls = []
+
+    @property
+    def keep_rows(self):
+        return self.sink is None
+
+    def __call__(self, url, row=None, error=None):
+        if row is not None:
+            self.done_urls.append(url)
+            if self.journal is not None: self.journal.row(url, row)
+            self.emit(row)
+        elif error is not None and self.journal is not None:
+            self.journal.error(url, error)
+
+    def emit(self, row):
+        write = self.sink.write if self.sink is not None else None
+        if self.images is not None:
+            self.images.submit(row, write)  # khong sink: row trong RAM duoc them cot anh tai cho
+        elif write is not None:
+            write(row)
+
+
+# ===== BUOC 2: Cao chi tiet =====
+def print_progress(idx, total, start_time, extra=""):
+    if idx % 10 == 0 or idx == total:
+        elapsed = time.time() - start_time
+        remaining = elapsed / idx * (total - idx)
+        bar = '█' * int(40 * idx / total) + '░' * (40 - int(40 * idx / total))
+        print(f"[{idx}/{total}] [{bar}] {idx / total * 100:.1f}% "
+              f"{int(elapsed / 60)}p{int(elapsed % 60)}s (Con ~{int(remaining / 60)}p)" + (f" {extra}" if extra else ""))
+
+
+def make_progress(total, recorder=None, controller=None):
+    """Callback on_done(url, row, error): in tien do va chuyen ket qua cho recorder"""
+    start_time = time.time()
+    done = [0]
+
+    def on_done(url, row=None, error=None):
+        if recorder is not None: recorder(url, row, error)
+        done[0] += 1
+        print_progress(done[0], total, start_time, controller.status() if controller is not None else "")
+    return on_done
+
+
+def expired(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def scrape_selenium(urls, get_driver, wait_log=None, on_done=None, keep_rows=True, extract=extract_product,
+                    deadline=None):
+    rows, errors = [], []
+    for url in urls:
+        if expired(deadline): break
+        row = error = None
+        try:
+            driver = get_driver()
+            get_ready(driver, url, wait_log)
+            row = extract(driver, url)
+            if keep_rows: rows.append(row)
+        except Exception as e:
+            error = str(e)
+            errors.append({"url": url, "error": error, "kind": classify(e)})
+            METRICS.error("detail", e, url)
+        if on_done: on_done(url, row, error)
+    return rows, errors
+
+
+def scrape_browser(urls, get_driver, workers, wait_log, on_done=None, keep_rows=True, extract=extract_product,
+                   pool=None, deadline=None):
+    """
+    Cac trang can trinh duyet: 1 Chrome tuan tu, hoac pool nhieu Chrome neu workers > 1
+    (pool: ChromePool dung chung ca lan chay, khong thi mo pool rieng cho lan nay).
+    """
+    if workers <= 1:
+        return scrape_selenium(urls, get_driver, wait_log, on_done, keep_rows, extract, deadline)
+    if pool is not None:
+        return pool.crawl(urls, on_done, wait_log, keep_rows, deadline)
+    rows, errors, restarts = chrome_pool.crawl_products(urls, workers, on_done=on_done, wait_log=wait_log,
+                                                        keep_rows=keep_rows, extract=extract, lean=get_driver.lean,
+                                                        deadline=deadline)
+    if restarts: print(f"  Khoi dong lai worker: {restarts} lan")
+    return rows, errors
+
+
+def scrape_async(product_links, concurrency, rate, get_driver, workers, wait_log, state=None, recorder=None,
+                 extract=extract_product, archive=None, controller=None, pool=None, deadline=None):
+    keep_rows = recorder is None or recorder.keep_rows
+    on_done = make_progress(len(product_links), recorder, controller)
+    rows, errors, browser_urls, kinds = crawl_products(product_links, concurrency, rate, on_done, state, keep_rows,
+                                                       archive, controller, deadline)
+    if controller is not None: print(f"  {controller.summary()}")
+    stats = {"http": kinds["http"], "selenium": 0, "cached": kinds["cached"]}
+    if browser_urls and not expired(deadline):
+        print(f"\n  {len(browser_urls)} trang can JavaScript -> Selenium...")
+        more_rows, more_errors = scrape_browser(browser_urls, get_driver, workers, wait_log,
+                                                make_progress(len(browser_urls), recorder), keep_rows, extract,
+                                                pool, deadline)
+        stats["selenium"] = len(browser_urls) - len(more_errors)
+        rows += more_rows
+        errors += more_errors
+    return rows, errors, stats
+
+
+def scrape_all(product_links, mode, session, get_driver, wait_log, state=None, recorder=None,
+               extract=extract_product, archive=None, deadline=None):
+    keep_rows = recorder is None or recorder.keep_rows
+    rows, errors = [], []
+    stats = {"http": 0, "selenium": 0, "cached": 0}
+    on_done = make_progress(len(product_links), recorder)
+
+    for idx, url in enumerate(product_links, start=1):
+        if expired(deadline): break
+        row = error = None
+        try:
+            if mode == "selenium":
+                driver = get_driver()
+                get_ready(driver, url, wait_log)
+                row, used = extract(driver, url), "selenium"
+            else:
+                row, used = scrape_product(url, session, get_driver, wait_log, state, extract, archive)
+            stats[used] += 1
+            if keep_rows: rows.append(row)
+        except Exception as e:
+            error = str(e)
+            errors.append({"url": url, "error": error, "kind": classify(e)})
+            METRICS.error("detail", e, url)
+            if idx % 10 == 0: print(f"  Loi [{idx}]: {url[:50]}...")
+        on_done(url, row, error)
+
+    return rows, errors, stats
+
+
+def make_extract(args, archive=None):
+    extract = EXTRACTORS[args.extractor]
+    return Archiving(extract, archive) if archive is not None else extract
+
+
+def make_controller(args):
+    if args.mode != "async" or args.no_adaptive: return None
+    return AimdController(args.concurrency, args.max_concurrency, args.target_p95)
+
+
+def scrape_detail(product_links, args, session, get_driver, wait_log, state=None, recorder=None, archive=None,
+                  controller=None, pool=None, deadline=None):
+    """
+    controller / pool: tao 1 lan cho ca lan chay (giu trang thai AIMD, khong mo lai Chrome moi vong thu lai),
+    khong truyen thi tao rieng cho lan goi nay. deadline: moc time.monotonic() (--budget-minutes).
+    """
+    extract = make_extract(args, archive)
+    if args.mode == "async":
+        if controller is None: controller = make_controller(args)
+        return scrape_async(product_links, args.concurrency, args.rate, get_driver, args.workers,
+                            wait_log, state, recorder, extract, archive, controller, pool, deadline)
+    if args.mode == "pool":
+        rows, errors = scrape_browser(product_links, get_driver, args.workers, wait_log,
+                                      make_progress(len(product_links), recorder),
+                                      recorder is None or recorder.keep_rows, extract, pool, deadline)
+        return rows, errors, {"http": 0, "selenium": len(product_links) - len(errors)}
+    return scrape_all(product_links, args.mode, session, get_driver, wait_log, state, recorder, extract, archive,
+                      deadline)
+
+
+def retry_failed(errors, args, session, get_driver, wait_log, state=None, recorder=None, archive=None,
+                 controller=None, pool=None, deadline=None):
+    """
+    Cao lai URL loi transient theo RetryQueue (backoff luy thua + jitter), roi 1 luot cuoi
+    bang Selenium tuan tu cho cac URL van loi transient. Tra ve (rows, errors, stats).
+    Het deadline: khong cho / thu lai nua, URL dang cho tinh la loi.
+    """
+    queue = RetryQueue(args.max_attempts)
+    queue.add(errors)
+    rows, stats = [], {}
+
+    def record(urls, more_rows, more_errors, more_stats):
+        failed = {err["url"] for err in more_errors}
+        done = set(recorder.done_urls) if recorder is not None else {row["product_url"] for row in more_rows}
+        for url in urls:
+            if url in failed: continue
+            if url in done:
+                queue.resolved(url)
+            else:
+                queue.give_up([url])  # het deadline truoc khi toi luot
+        queue.add(more_errors)
+        rows.extend(more_rows)
+        for key, n in more_stats.items(): stats[key] = stats.get(key, 0) + n
+        METRICS.inc("retries", len(urls), stage="detail")
+
+    while len(queue):
+        if deadline is not None and queue.next_at() >= deadline:
+            print(f"\n  Het thoi gian: bo {len(queue)} URL dang cho thu lai")
+            queue.give_up()
+            break
+        urls = queue.due()
+        print(f"\n  Thu lai {len(urls)} URL loi transient (con cho: {len(queue)})...")
+        record(urls, *scrape_detail(urls, args, session, get_driver, wait_log, state, recorder, archive,
+                                    controller, pool, deadline))
+
+    left = [err["url"] for err in queue.transient_left()]
+    if left and not args.no_final_pass and not expired(deadline):
+        print(f"\n  Luot cuoi: {len(left)} URL van loi -> Selenium tuan tu...")
+        more_rows, more_errors = scrape_selenium(left, get_driver, wait_log, make_progress(len(left), recorder),
+                                                 recorder is None or recorder.keep_rows, EXTRACTORS[args.extractor],
+                                                 deadline)
+        record(left, more_rows, more_errors, {"selenium": len(left) - len(more_errors)})
+        queue.give_up()  # luot cuoi khong xep lai hang doi
+    if queue.retried: print(f"  Da thu lai {queue.retried} lan, con loi: {len(queue.failed)}")
+    return rows, queue.errors(), stats
+
+
+def save_error_file(errors, args):
+    """Ghi URL loi con lai de chay --retry-from"""
+    if not errors: return None
+    path = os.path.splitext(args.sink or args.output)[0] + "_errors.jsonl"
+    save_errors(path, errors)
+    return path
+
+
+def write_metrics(args):
+    if not METRICS.enabled: return
+    prom_file = args.prom_file or os.path.splitext(args.metrics)[0] + ".prom"
+    METRICS.write_prom(prom_file)
+    METRICS.close()
+    print(f"\nMetrics ({args.metrics}, {prom_file}):\n{METRICS.summary()}")
+
+
+# ===== BUOC 3: Xuat Excel =====
+def export_excel(rows, output_file, columns=COLUMNS):
+    import pandas as pd  # chi can o buoc cuoi, khong bat worker / test phai import pandas
+    df = pd.DataFrame(rows, columns=columns)
+    df = df.map(clean_excel)
+    for col in ["rating_score", "count_rate", "sold_count", "first_comment"]:
+        df[col] = df[col].astype(str).replace('None', '').replace('nan', '')
+    df.to_excel(output_file, index=False)
+    return df
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Vuadocau.com scraper")
+    parser.add_argument("--mode", choices=["http", "async", "selenium", "pool", "api"], default="http",
+                        help="http: tai HTML truc tiep, Selenium chi khi can JS; async: http song song; "
+                             "pool: moi trang qua pool Chrome headless; api: WooCommerce Store API")
+    parser.add_argument("--no-html-fallback", action="store_true",
+                        help="mode api: khong tai HTML de lay sold_count / first_comment / gia tung size")
+    parser.add_argument("--extractor", choices=list(EXTRACTORS), default="snapshot",
+                        help="trang Selenium: snapshot = parse page_source bang lxml, "
+                             "js = 1 lan execute_script (extract_product.js)")
+    parser.add_argument("--lean", action="store_true",
+                        help="Chrome headless + eager, chan anh / font / media / tracking (browser.py)")
+    parser.add_argument("--limit", type=int, help="chi cao N san pham dau tien (thay MAX_PRODUCTS cua 10product.py)")
+    parser.add_argument("--workers", type=int, default=chrome_pool.WORKERS,
+                        help="so Chrome headless chay song song (mode pool / fallback cua async)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="so request dong thoi (BUOC 1 va mode async)")
+    parser.add_argument("--rate", type=float, default=RATE,
+                        help="so request/giay toi da cho moi host (mode async)")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY,
+                        help="mode async: tran so request dong thoi khi AIMD tang dan (--concurrency la muc khoi dau)")
+    parser.add_argument("--target-p95", type=float, default=TARGET_P95,
+                        help="mode async: p95 latency (giay) muc tieu, vuot qua thi giam mot nua so request dong thoi")
+    parser.add_argument("--no-adaptive", action="store_true",
+                        help="mode async: giu co dinh --concurrency, khong dung AIMD")
+    parser.add_argument("--discovery", choices=["listing", "sitemap"], default="listing",
+                        help="BUOC 1: duyet trang listing hoac doc sitemap XML")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="discovery sitemap: chi cao san pham co lastmod moi hon lan fetch truoc")
+    parser.add_argument("--frontier", default=FRONTIER_DB, help="file SQLite luu URL + lastmod")
+    parser.add_argument("--incremental", action="store_true",
+                        help="mode http/async: conditional GET + hash, dung lai row khong doi tu lan truoc")
+    parser.add_argument("--state-db", default=STATE_DB, help="file SQLite luu ETag / hash / row tung URL")
+    parser.add_argument("--schedule", action="store_true",
+                        help="sap xep URL theo uu tien lam moi (scheduler.py: toc do ban, bien dong gia, doanh thu); "
+                             "bat luon --incremental")
+    parser.add_argument("--budget-requests", type=int,
+                        help="chi cao N san pham (voi --schedule: N san pham uu tien nhat)")
+    parser.add_argument("--budget-minutes", type=float,
+                        help="het so phut nay thi dung giao URL moi, ke ca thu lai (dung them voi --schedule)")
+    parser.add_argument("--journal", default=JOURNAL_FILE, help="file JSONL ghi tung row / loi ngay khi xong")
+    parser.add_argument("--resume", action="store_true",
+                        help="doc journal, bo qua BUOC 1 va chi cao cac link chua co row")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                        help="so lan cao toi da cho 1 URL loi transient (timeout, 429, 5xx...) truoc luot cuoi")
+    parser.add_argument("--no-final-pass", action="store_true",
+                        help="khong chay luot Selenium tuan tu cuoi cung cho URL van loi transient")
+    parser.add_argument("--retry-from",
+                        help="file loi (*_errors.jsonl) hoac journal cua lan truoc: bo qua BUOC 1, chi cao lai URL loi")
+    parser.add_argument("--archive", help="thu muc luu HTML da fetch (zstd, content-addressed) de reextract")
+    parser.add_argument("--sink", help="ghi tung batch ra .jsonl / .csv / .parquet thay vi gom 1 DataFrame")
+    parser.add_argument("--xlsx", action="store_true", help="dung voi --sink: chuyen file sink sang --output (xlsx)")
+    parser.add_argument("--metrics", help="file JSONL ghi thoi gian / loi / bytes tung stage, tung trang")
+    parser.add_argument("--prom-file", help="Prometheus textfile (mac dinh: cung ten voi --metrics, duoi .prom)")
+    parser.add_argument("--images", nargs="?", const=IMAGE_DIR,
+                        help=f"tai anh san pham song song vao kho content-addressed (mac dinh {IMAGE_DIR}/)")
+    parser.add_argument("--thumb-size", type=int, default=THUMB_SIZE, help="canh lon nhat cua thumbnail (px)")
+    parser.add_argument("--image-workers", type=int, help="so tien trinh tao thumbnail (mac dinh: so core)")
+    parser.add_argument("--reviews", action="store_true",
+                        help="sau BUOC 3: tai moi trang danh gia cua san pham co danh gia moi (reviews.py)")
+    parser.add_argument("--reviews-db", default=REVIEWS_DB, help="file SQLite luu danh gia")
+    parser.add_argument("--rule-stats", action="store_true",
+                        help="in so lan thu / trung / thoi gian tung strategy trich xuat (rules.py)")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    return parser
+
+
+def crawl_urls(urls, mode="http", limit=None, workers=None, extractor="snapshot"):
+    """
+    Cao 1 danh sach URL co san (khong BUOC 1 / journal / sink), Chrome chi mo khi co trang can.
+    Tra ve (rows, errors, stats).
+    """
+    if mode == "api": raise ValueError("crawl_urls khong ho tro mode api")
+    argv = ["--mode", mode, "--extractor", extractor] + (["--workers", str(workers)] if workers else [])
+    args = build_parser().parse_args(argv)
+    urls, _ = dedup_urls(urls)
+    if limit: urls = urls[:limit]
+    get_driver = LazyDriver()
+    try:
+        return scrape_detail(urls, args, make_session(), get_driver, WaitLog())
+    finally:
+        get_driver.quit()
+
+
+def main(argv=None):
+    """argv: danh sach tham so (mac dinh sys.argv), de cac script cu goi lai voi tham so san"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    journal_links, done_rows, retry_links = [], {}, []
+    if args.retry_from:
+        if args.resume or args.mode == "api": parser.error("--retry-from khong dung chung voi --resume / --mode api")
+        retry_links, retry_dups = dedup_urls(load_errors(args.retry_from))
+    elif args.resume:
+        journal_links, done_rows, _ = load_journal(args.journal)
+    elif args.mode != "api" and os.path.exists(args.journal) and os.path.getsize(args.journal):
+        parser.error(f"{args.journal} da ton tai - dung --resume de chay tiep, hoac xoa file / doi --journal")
+
+    print(f"VUADOCAU.COM SCRAPER ({args.mode}) - Bat dau...")
+    print(f"Thoi gian: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Output: {args.sink or args.output}\n")
+
+    if args.metrics: METRICS.open(args.metrics)
+    session = make_session()
+    get_driver = LazyDriver(headless=args.lean, lean=args.lean)
+    wait_log = WaitLog()
+    start_time = time.time()
+    fetch_started = now_utc()
+    frontier = Frontier(args.frontier) if args.discovery == "sitemap" else None
+    state = StateStore(args.state_db) if args.incremental or args.schedule else None
+    archive = HtmlArchive(args.archive) if args.archive else None
+    # --retry-from: ghi noi vao journal cu (co the chinh la file loi dang doc)
+    journal = Journal(args.journal, append=args.resume or bool(args.retry_from)) if args.mode != "api" else None
+    columns = COLUMNS + IMAGE_COLUMNS if args.images else COLUMNS
+    sink = open_sink(args.sink, columns=columns) if args.sink else None
+    images = (ImagePipeline(args.images, args.concurrency, args.rate, args.thumb_size, args.image_workers)
+              if args.images else None)
+    recorder = Recorder(journal, sink, images)
+    # Dung chung ca lan chay (ke ca cac vong thu lai): AIMD giu trang thai, Chrome chi mo 1 lan
+    controller = make_controller(args)
+    pool = (chrome_pool.ChromePool(args.workers, extract=make_extract(args, archive), lean=args.lean)
+            if args.mode in ("async", "pool") and args.workers > 1 else None)
+    try:
+        if args.mode == "api":
+            print("BUOC 1+2: Lay san pham qua Store API...\n")
+            rows, errors = store_api.crawl_store_api(args.base_url, not args.no_html_fallback,
+                                                     concurrency=args.concurrency, rate=args.rate)
+            product_links = [row["product_url"] for row in rows]
+            for row in rows: recorder(row["product_url"], row)
+            stats = {"http": len(rows), "selenium": 0}
+        else:
+            print("BUOC 1: Lay danh sach san pham...\n")
+            if args.retry_from:
+                product_links = retry_links[:args.limit] if args.limit else retry_links
+                print(f"  Cao lai {len(retry_links)} URL loi tu {args.retry_from}"
+                      + (f" (bo {retry_dups} link trung)" if retry_dups else ""))
+            elif journal_links:
+                product_links = journal_links
+                print(f"  Resume tu {args.journal}: da co {len(done_rows)} row")
+            else:
+                with METRICS.timer("discovery"):
+                    if frontier is not None:
+                        product_links = discover_from_sitemap(args.base_url, frontier, args.changed_only)
+                    else:
+                        product_links, _ = discover_links(args.base_url, args.concurrency, args.rate, args.limit)
+                if args.limit: product_links = product_links[:args.limit]
+                journal.links(product_links)
+            todo = pending(product_links, done_rows)
+            if args.schedule:
+                todo, later, _ = plan(todo, state, args.budget_requests)
+                if later: print(f"  Lich uu tien: de lai {len(later)} san pham cho lan sau")
+            elif args.budget_requests is not None and len(todo) > args.budget_requests:
+                print(f"  Ngan sach: de lai {len(todo) - args.budget_requests} san pham cho lan sau")
+                todo = todo[:args.budget_requests]
+            print(f"\nTONG: {len(product_links)} san pham, can cao: {len(todo)}\n")
+
+            # Row da co tu journal / snapshot truoc: dua thang vao ket qua, khong ghi lai journal
+            carried = list(done_rows.values())
+            if state is not None and frontier is not None and args.changed_only:
+                old = state.rows_for(set(frontier.all_urls()) - set(product_links))
+                if old: print(f"  Giu nguyen {len(old)} san pham khong cao lai tu snapshot truoc")
+                carried += old
+            for row in carried:
+                recorder.done_urls.append(row["product_url"])
+                recorder.emit(row)
+
+            print("=" * 80)
+            print("BUOC 2: Cao chi tiet tung san pham...\n")
+            deadline = time.monotonic() + args.budget_minutes * 60 if args.budget_minutes else None
+            with METRICS.timer("detail"):
+                rows, errors, stats = scrape_detail(todo, args, session, get_driver, wait_log, state, recorder,
+                                                    archive, controller, pool, deadline)
+                if errors:
+                    more_rows, errors, more_stats = retry_failed(errors, args, session, get_driver, wait_log, state,
+                                                                 recorder, archive, controller, pool, deadline)
+                    rows += more_rows
+                    for key, n in more_stats.items(): stats[key] = stats.get(key, 0) + n
+            if deadline is not None:
+                reached = set(recorder.done_urls) | {err["url"] for err in errors}
+                unreached = [url for url in todo if url not in reached]
+                if unreached: print(f"\n  Het {args.budget_minutes:g} phut: {len(unreached)} san pham chua cao")
+            if sink is None: rows = carried + rows
+        if frontier is not None:
+            frontier.mark_fetched(recorder.done_urls, fetch_started)
+    finally:
+        get_driver.quit()
+        if pool is not None:
+            pool.close()
+            if pool.restarts: print(f"  Khoi dong lai worker: {pool.restarts} lan")
+        if frontier is not None: frontier.close()
+        if state is not None: state.close()
+        if archive is not None: archive.close()
+        if journal is not None: journal.close()
+        if images is not None: images.close()  # truoc sink: row cuoi con cho anh
+        if sink is not None: sink.close()
+
+    error_file = save_error_file(errors, args)
+    n_rows = sink.count if sink is not None else len(rows)
+    if not n_rows:
+        print("\nKhong co du lieu!")
+        if error_file: print(f"URL loi: {error_file} (--retry-from de cao lai)")
+        if journal is not None: os.remove(args.journal)
+        write_metrics(args)
+        return
+
+    print(f"\n{'=' * 80}")
+    print("BUOC 3: Xuat du lieu...\n")
+    with METRICS.timer("export"):
+        if sink is None:
+            export_excel(rows, args.output, columns)
+        elif args.xlsx:
+            to_xlsx(args.sink, args.output, columns)
+    if journal is not None:
+        # Output da ghi xong: journal chi con de --resume khi crash, URL loi da nam trong file loi
+        os.remove(args.journal)
+
+    total_time = time.time() - start_time
+    print(f"HOAN THANH! {n_rows}/{len(product_links)} san pham, loi: {len(errors)}")
+    print(f"  - HTTP: {stats['http']}, Selenium fallback: {stats['selenium']}"
+          + (f", dung lai (304 / khong doi): {stats['cached']}" if stats.get("cached") else ""))
+    if state is not None: print(f"  - Incremental: {state.summary()}")
+    if images is not None: print(f"  - Anh ({args.images}): {images.summary()}")
+    if wait_log.records:
+        print(f"  - {wait_log.summary()}")
+        wait_log.to_csv(os.path.splitext(args.sink or args.output)[0] + "_waits.csv")
+    print(f"  - Thoi gian: {int(total_time // 60)} phut {int(total_time % 60)} giay")
+    if args.rule_stats and ENGINE.stats.order:
+        print(f"\nStrategy trich xuat (tien trinh chinh):\n{ENGINE.stats.report()}")
+    print(f"File: {args.sink or args.output}" + (f" + {args.output}" if sink is not None and args.xlsx else ""))
+    if args.reviews:
+        print(f"\n{'=' * 80}")
+        print("BUOC 4: Thu thap danh gia...\n")
+        with METRICS.timer("reviews"):
+            harvest_reviews(iter_rows(args.sink) if sink is not None else rows, args.reviews_db,
+                            args.concurrency, args.rate)
+    if errors:
+        print(f"\nCo {len(errors)} loi (5 dau):")
+        for err in errors[:5]: print(f"  - {err['url'][:55]}... ({err.get('kind', '?')})")
+        if error_file: print(f"Cao lai chi cac URL loi: python scripts/crawl.py --retry-from {error_file}")
+    write_metrics(args)
+
+
+if __name__ == "__main__":
+    main()
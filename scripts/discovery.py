@@ -0,0 +1,98 @@
+# coding: utf-8
+"""
+BUOC 1 song song: doc so trang cuoi tu trang listing dau tien, roi tai
+/shop/page/N/ cho moi N cung luc thay vi bam "next" + sleep tung trang.
+
+Trang nao loi thi thu lai rieng trang do (MAX_RETRIES), khong dung ca vong lap.
+"""
+
+import asyncio
+import math
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+from selenium.webdriver.common.by import By
+
+from async_crawl import CONCURRENCY, RATE, HostRateLimiter, fetch_page
+from canonical import dedup_urls
+from http_fetch import HEADERS, TIMEOUT
+from metrics import METRICS
+
+MAX_RETRIES = 3
+LINK_SELECTOR = "li.product a.woocommerce-LoopProduct-link"
+
+
+def page_url(base_url, n):
+    """https://vuadocau.com/shop/ + 3 -> https://vuadocau.com/shop/page/3/ (giu query string)"""
+    if n <= 1: return base_url
+    parts = urlsplit(base_url)
+    path = parts.path if parts.path.endswith("/") else parts.path + "/"
+    return urlunsplit((parts.scheme, parts.netloc, f"{path}page/{n}/", parts.query, ""))
+
+
+def last_page_number(page):
+    nums = [1]
+    for a in page.find_elements(By.CSS_SELECTOR, "a.page-numbers, span.page-numbers"):
+        m = re.search(r"/page/(\d+)/?", a.get_attribute("href") or "")
+        if m: nums.append(int(m.group(1)))
+        txt = a.text.replace(".", "").replace(",", "").strip()
+        if txt.isdigit(): nums.append(int(txt))
+    return max(nums)
+
+
+def page_links(page):
+    return [href for href in (c.get_attribute("href") for c in page.find_elements(By.CSS_SELECTOR, LINK_SELECTOR))
+            if href]
+
+
+async def _fetch_with_retry(session, limiter, url):
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            with METRICS.timer("discovery_page", url):
+                return await fetch_page(session, limiter, url)
+        except Exception as e:
+            METRICS.error("discovery", e, url)
+            if attempt == MAX_RETRIES: raise
+            METRICS.inc("retries", url=url, stage="discovery")
+            await asyncio.sleep(2 ** attempt)
+
+
+async def _discover(base_url, concurrency, rate, limit=None):
+    limiter = HostRateLimiter(rate)
+    sem = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout) as session:
+        first = await _fetch_with_retry(session, limiter, base_url)
+        last = last_page_number(first)
+        # --limit: chi tai du so trang listing can cho limit san pham
+        if limit: last = min(last, math.ceil(limit / max(1, len(page_links(first)))))
+        print(f"  So trang: {last}")
+
+        async def one(n):
+            async with sem:
+                return n, page_links(await _fetch_with_retry(session, limiter, page_url(base_url, n)))
+
+        results = await asyncio.gather(*(one(n) for n in range(2, last + 1)), return_exceptions=True)
+
+    links, failed = list(page_links(first)), []
+    for n, res in zip(range(2, last + 1), results):
+        if isinstance(res, Exception):
+            failed.append({"url": page_url(base_url, n), "error": str(res)})
+        else:
+            links.extend(res[1])
+    return links, failed, last
+
+
+def discover_links(base_url, concurrency=CONCURRENCY, rate=RATE, limit=None):
+    """
+    Tra ve (product_links, failed_pages). Thu tu giu nguyen theo trang, bo trung (URL da chuan hoa).
+    limit: chi lay limit san pham dau tien.
+    """
+    links, failed, last = asyncio.run(_discover(base_url, concurrency, rate, limit))
+    product_links, skipped = dedup_urls(links, "discovery")
+    if limit: product_links = product_links[:limit]
+    print(f"  {last - len(failed)}/{last} trang OK, {len(product_links)} san pham"
+          + (f" (bo {skipped} link trung)" if skipped else ""))
+    for f in failed: print(f"  Loi trang: {f['url']} - {f['error']}")
+    return product_links, failed
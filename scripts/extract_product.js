@@ -0,0 +1,83 @@
+// Chay trong trang san pham bang 1 lan driver.execute_script(...)
+// arguments[0] = danh sach strategy tu rules.js_rules() ({field, name, kind, css / attrs / pattern / flags / xpath}).
+// Chi lay gia tri tho cua tung strategy: {field: {ten strategy: gia tri}}; thu tu strategy, regex / then
+// va RuleStats chay o Python (rules.RuleEngine.extract_raw) nen row giong het extractors.extract_product.
+var specs = arguments[0];
+
+function q(sel) {
+  return document.querySelector(sel);
+}
+
+function text(el) {
+  return el ? (el.innerText || el.textContent || "").trim() : null;
+}
+
+function attr(el, name) {
+  return el ? el.getAttribute(name) : null;
+}
+
+var html = document.documentElement.outerHTML;
+var variations;
+
+function getVariations() {
+  if (variations === undefined) {
+    variations = null;
+    try {
+      var data = JSON.parse(attr(q("form.variations_form"), "data-product_variations") || "null");
+      if (Array.isArray(data) && data.length) variations = data;
+    } catch (e) {}
+  }
+  return variations;
+}
+
+function group(m) {
+  return m.length > 1 ? m[1] : m[0];
+}
+
+function probe(spec) {
+  switch (spec.kind) {
+    case "text":
+      return text(q(spec.css));
+    case "attr":
+      var el = q(spec.css);
+      if (!el) return null;
+      for (var i = 0; i < spec.attrs.length; i++) {
+        var name = spec.attrs[i];
+        // src / href tuyet doi giong HtmlPage (make_links_absolute)
+        var val = attr(el, name) && (name === "src" || name === "href") ? el[name] : attr(el, name);
+        if (val) return val;
+      }
+      return null;
+    case "source":
+      var m = html.match(new RegExp(spec.pattern, spec.flags));
+      return m ? group(m) : null;
+    case "source_all":
+      var all = Array.from(html.matchAll(new RegExp(spec.pattern, spec.flags + "g")), group);
+      return all.length ? all : null;
+    case "xpath_text":
+      var re = new RegExp(spec.pattern, spec.flags);
+      var found = document.evaluate(spec.xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+      for (var j = 0; j < found.snapshotLength; j++) {
+        var mt = (text(found.snapshotItem(j)) || "").match(re);
+        if (mt) return mt[1];
+      }
+      return null;
+    case "variations":
+      return getVariations();
+    case "swatches":
+      return Array.prototype.map.call(document.querySelectorAll(spec.css), function (el) {
+        return {
+          text: text(el),
+          title: attr(el, "title") || attr(el, "data-value") || "",
+          value: el.value !== undefined && el.value !== null ? String(el.value) : attr(el, "value") || ""
+        };
+      });
+  }
+  throw new Error("Khong ho tro loai strategy: " + spec.kind);
+}
+
+var out = {};
+specs.forEach(function (spec) {
+  (out[spec.field] = out[spec.field] || {})[spec.name] = probe(spec);
+});
+return out;
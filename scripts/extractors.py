@@ -0,0 +1,283 @@
+# coding: utf-8
+"""
+Cac ham trich xuat du lieu san pham - dung chung cho Selenium va HTTP.
+
+Moi ham nhan `page`: co the la webdriver cua Selenium, hoac HtmlPage
+(HTML tai ve bang HTTP). Ca hai deu co find_element / find_elements / page_source.
+
+extract_product luon chup 1 snapshot (HtmlPage) truoc khi trich xuat: voi Selenium
+chi con 1 lan goi driver.page_source, moi selector chay tren cay lxml trong tien trinh.
+Thu tu fallback cua tung truong (giong final-craw.py) khai bao trong rules.py.
+"""
+
+import html
+import re
+from functools import lru_cache
+
+from lxml import etree, html as lxml_html
+from lxml.cssselect import CSSSelector
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+# Thu tu cot giong file Excel cua final-craw.py
+COLUMNS = ["name", "size", "price", "color", "rating_score", "count_rate",
+           "sold_count", "first_comment", "short_description", "product_url", "image_url"]
+
+BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "tr", "table", "section", "article",
+              "h1", "h2", "h3", "h4", "h5", "h6", "header", "footer", "form", "blockquote"}
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+# Giong openpyxl.cell.cell.ILLEGAL_CHARACTERS_RE (import openpyxl mat ~150ms, chi de lay regex nay)
+ILLEGAL_CHARACTERS_RE = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
+
+
+# ===== HTML PAGE (thay the driver khi tai bang HTTP) =====
+def _visible_text(el):
+    """Lay text giong .text cua Selenium: bo script/style, xuong dong o the block"""
+    parts = []
+
+    def walk(node):
+        if not isinstance(node.tag, str) or node.tag in SKIP_TAGS:
+            if node.tail: parts.append(node.tail)
+            return
+        if node.tag == "br":
+            parts.append("\n")
+        elif node.tag in BLOCK_TAGS:
+            parts.append("\n")
+        if node.text: parts.append(node.text)
+        for child in node:
+            walk(child)
+        if node.tag in BLOCK_TAGS: parts.append("\n")
+        if node.tail and node is not el: parts.append(node.tail)
+
+    walk(el)
+    lines = [re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in "".join(parts).split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+class HtmlElement:
+    def __init__(self, el):
+        self._el = el
+
+    @property
+    def text(self):
+        return _visible_text(self._el)
+
+    def get_attribute(self, name):
+        val = self._el.get(name)
+        if val is None and name == "value" and self._el.tag == "option":
+            return self.text
+        return val
+
+    def find_element(self, by, sel):
+        return _find_element(self._el, by, sel)
+
+    def find_elements(self, by, sel):
+        return _find_elements(self._el, by, sel)
+
+
+class HtmlPage:
+    """Trang HTML da parse, co API giong webdriver (find_element, page_source...)"""
+
+    def __init__(self, source, base_url=None):
+        self.page_source = source
+        self.current_url = base_url
+        self._root = lxml_html.fromstring(source)
+        if base_url:
+            self._root.make_links_absolute(base_url, resolve_base_href=True)
+
+    @classmethod
+    def from_file(cls, path, base_url=None):
+        with open(path, encoding="utf-8") as f:
+            return cls(f.read(), base_url=base_url)
+
+    def find_element(self, by, sel):
+        return _find_element(self._root, by, sel)
+
+    def find_elements(self, by, sel):
+        return _find_elements(self._root, by, sel)
+
+
+def snapshot(page):
+    """Webdriver -> HtmlPage (1 round trip lay page_source); HtmlPage giu nguyen"""
+    if isinstance(page, HtmlPage): return page
+    return HtmlPage(page.page_source, base_url=page.current_url)
+
+
+# Compile CSS -> XPath 1 lan cho moi selector (cssselect translate kha cham)
+@lru_cache(maxsize=None)
+def _css(sel):
+    return CSSSelector(sel)
+
+
+@lru_cache(maxsize=None)
+def _xpath(sel):
+    return etree.XPath(sel)
+
+
+def _find_elements(root, by, sel):
+    if by == By.CSS_SELECTOR:
+        nodes = _css(sel)(root)
+    elif by == By.TAG_NAME:
+        nodes = root.iter(sel)
+    elif by == By.XPATH:
+        nodes = _xpath(sel)(root)
+    else:
+        raise ValueError(f"Khong ho tro locator: {by}")
+    return [HtmlElement(n) for n in nodes if isinstance(getattr(n, "tag", None), str)]
+
+
+def _find_element(root, by, sel):
+    found = _find_elements(root, by, sel)
+    if not found:
+        raise NoSuchElementException(f"{by}={sel}")
+    return found[0]
+
+
+# ===== HELPERS =====
+def clean_excel(val):
+    return ILLEGAL_CHARACTERS_RE.sub("", val) if isinstance(val, str) else val
+
+
+def strip_html(text):
+    """Chuoi HTML (JSON cua Store API) -> text, moi <br> / </p> / </li> 1 dong"""
+    text = re.sub(r"<br\s*/?>|</p>|</li>", "\n", text or "", flags=re.IGNORECASE)
+    text = html.unescape(re.sub(r"<[^>]+>", "", text))
+    lines = [re.sub(r"\s+", " ", line).strip() for line in text.split("\n")]
+    return "\n".join(line for line in lines if line) or None
+
+
+def safe_text(page, by, sel):
+    try:
+        return page.find_element(by, sel).text.strip()
+    except:
+        return None
+
+
+# Danh sach selector / tu khoa dung chung cho extractor Python va JS (js_extract.py)
+PRICE_SELECTORS = ["p.price .woocommerce-Price-amount bdi", "p.price .woocommerce-Price-amount",
+                   "p.price .amount bdi", "p.price .amount", "span.woocommerce-Price-amount bdi",
+                   "span.woocommerce-Price-amount", ".price bdi", ".price .amount",
+                   "p.price ins .amount", "p.price span.amount"]
+SWATCH_SELECTORS = ["ul.variable-items-wrapper span.variable-item-span",
+                    "div.variations select[name*='color'] option",
+                    "div.variations select[name*='mau'] option",
+                    "ul.color-variable-wrapper li",
+                    ".tawcvs-swatches .swatch-item-wrapper",
+                    ".variations td.value .select-wrapper option"]
+SKIP_OPTIONS = ["choose an option", "chọn một tùy chọn", "chọn", ""]
+
+
+# ===== PARSE (khong phu thuoc page) =====
+def size_price_from_variations(variations):
+    """data-product_variations -> {size: price}"""
+    size_price = {}
+    try:
+        for v in variations:
+            if not v.get("is_purchasable", True): continue
+            attrs = v.get("attributes", {})
+            price_raw = v.get("display_price") or v.get("price")
+            if price_raw is None: continue
+
+            size = None
+            for key, val in attrs.items():
+                if any(kw in key.lower() for kw in ["size", "kich", "chieu", "dai", "length"]):
+                    size = str(val).strip()
+                    break
+            if not size and attrs: size = str(list(attrs.values())[0]).strip()
+
+            if size and size not in size_price:
+                price_val = float(price_raw)
+                size_price[size] = str(int(price_val)) if price_val == int(price_val) else str(price_val)
+    except:
+        pass
+    return size_price
+
+
+def join_size_price(size_price):
+    if not size_price: return None, None
+    # Sort
+    try:
+        sorted_items = sorted(size_price.items(),
+                              key=lambda x: float(re.findall(r'[\d.]+', x[0])[0] or 0))
+        size_price = dict(sorted_items)
+    except:
+        pass
+    return " | ".join(size_price.keys()), " | ".join(size_price.values())
+
+
+def price_from_text(price_text, minimum=0):
+    price_clean = re.sub(r'[^\d]', '', price_text or "")
+    if price_clean and int(price_clean) > minimum: return price_clean
+    return None
+
+
+def swatch_label(txt, title, value):
+    color_text = txt or title or value
+    if color_text and color_text.lower() not in SKIP_OPTIONS: return color_text
+    return None
+
+
+def colors_from_variations(variations):
+    colors = []
+    for v in variations:
+        for key, val in v.get("attributes", {}).items():
+            if any(x in key.lower() for x in ["color", "mau", "colour", "nhom", "group"]):
+                if val and str(val).strip(): colors.append(str(val).strip())
+    return colors
+
+
+def colors_from_description(desc):
+    m = re.search(r'[Mm]àu\s*sắc\s*[:\-]\s*([^\n.]+)', desc or "")
+    return [c.strip() for c in re.split(r'[,;–\-/]', m.group(1)) if c.strip()] if m else []
+
+
+def color_from_gp_codes(codes):
+    """Danh sach ma GP-xxx tim thay trong HTML -> 'GP-1 ~ GP-5' hoac 'GP-1 | GP-7'"""
+    gps = sorted(set(g.upper() for g in codes))
+    if not gps: return None
+    nums = [int(g.split("-")[1]) for g in gps]
+    if len(nums) > 2 and max(nums) - min(nums) == len(nums) - 1:
+        return f"GP-{min(nums)} ~ GP-{max(nums)}"
+    return " | ".join(gps)
+
+
+def color_from_title(title):
+    m = re.search(r'[\(\[\-\s]+(GP-\d+)', title or "", re.IGNORECASE)
+    return m.group(1).upper() if m else None
+
+
+# ===== SCRAPING FUNCTIONS =====
+# Cac strategy / fallback cua tung truong khai bao trong rules.py (RULES)
+def _field(page, field):
+    from rules import ENGINE
+    return ENGINE.field(page, field)
+
+
+def get_image_url(page):
+    return _field(page, "image_url")
+
+
+def get_rating(page):
+    return _field(page, "rating_score"), _field(page, "count_rate")
+
+
+def get_first_comment(page):
+    return _field(page, "first_comment")
+
+
+def get_sold_count(page):
+    return _field(page, "sold_count")
+
+
+def get_size_price_raw(page):
+    return _field(page, "size_price") or (None, None)
+
+
+def get_color_group(page):
+    return _field(page, "color")
+
+
+def extract_product(page, url):
+    """Chay tat ca extractor tren 1 trang, tra ve dict giong rows cua final-craw.py"""
+    from rules import ENGINE
+    return ENGINE.extract(page, url)
@@ -0,0 +1,82 @@
+# coding: utf-8
+"""
+Tai trang san pham bang HTTP (khong can trinh duyet).
+
+Hau het du lieu (h1, mo ta ngan, data-product_variations, star-rating,
+woocommerce-review-link) nam san trong HTML do server render, nen chi can
+requests + lxml. Selenium chi dung khi trang thieu du lieu (can JavaScript).
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.webdriver.common.by import By
+
+from extractors import HtmlPage, extract_product
+from metrics import METRICS
+from waits import get_ready
+
+HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"),
+    "Accept-Language": "vi-VN,vi;q=0.9,en;q=0.8",
+}
+TIMEOUT = 20
+
+
+def make_session(pool_size=10):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_page(session, url):
+    resp = session.get(url, timeout=TIMEOUT)
+    resp.raise_for_status()
+    return HtmlPage(resp.text, base_url=resp.url)
+
+
+def needs_browser(page):
+    """Trang can JavaScript neu thieu ten hoac khong co form bien the / gia"""
+    if not page.find_elements(By.TAG_NAME, "h1"):
+        return True
+    return not (page.find_elements(By.CSS_SELECTOR, "form.variations_form")
+                or page.find_elements(By.CSS_SELECTOR, "p.price"))
+
+
+def scrape_product(url, session, get_driver=None, wait_log=None, state=None, extract=extract_product,
+                   archive=None):
+    """
+    Cao 1 san pham. Tra ve (row, mode) voi mode = "http", "selenium" hoac "cached".
+    get_driver: ham tra ve webdriver, chi goi khi can fallback.
+    state: StateStore -> gui conditional GET, 304 / HTML khong doi thi dung lai row cu.
+    extract: ham trich xuat dung cho trang fallback Selenium.
+    archive: HtmlArchive -> luu HTML da dung de trich xuat (archive.py reextract).
+    """
+    headers = state.conditional_headers(url) if state is not None else {}
+    with METRICS.timer("fetch", url):
+        resp = session.get(url, headers=headers, timeout=TIMEOUT)
+    if resp.status_code == 304 and state is not None:
+        row = state.carry_forward(url)
+        if row is not None: return row, "cached"
+        with METRICS.timer("fetch", url):
+            resp = session.get(url, timeout=TIMEOUT)
+    resp.raise_for_status()
+    METRICS.inc("bytes", len(resp.content), url, stage="fetch")
+
+    etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    if state is not None and state.is_same_body(url, resp.content):
+        return state.carry_forward(url, "same_body", etag, last_modified), "cached"
+
+    page = HtmlPage(resp.text, base_url=resp.url)
+    if needs_browser(page) and get_driver is not None:
+        driver = get_driver()
+        get_ready(driver, url, wait_log)
+        row, mode = extract(driver, url), "selenium"
+    else:
+        row, mode = extract_product(page, url), "http"
+        if archive is not None: archive.put(url, resp.text, resp.url)
+    if state is not None: state.save(url, row, resp.content, etag, last_modified)
+    return row, mode
@@ -0,0 +1,280 @@
+# coding: utf-8
+"""
+Tai anh san pham (image_url) song song, luu theo noi dung (content-addressed).
+
+    image_cache/
+        index.db                          # SQLite: image_url -> sha256, ETag, Last-Modified, kich thuoc
+        objects/ab/abcdef....jpg          # 1 file / noi dung anh (nhieu san pham chung anh -> 1 file)
+        thumbs/ab/abcdef..._300.jpg       # thumbnail, tao trong ProcessPoolExecutor
+
+Lan chay sau gui If-None-Match / If-Modified-Since: server tra 304 -> khong tai lai.
+Row duoc them cot image_path, image_sha256, image_width, image_height.
+
+Trong luc crawl (anh tai song song voi BUOC 2, row ghi vao sink khi anh xong):
+    python scripts/crawl.py --sink out.jsonl --images
+Cho file sink co san:
+    python scripts/images.py --from vuadocau.jsonl --output vuadocau_images.jsonl
+Can: pip install pillow
+"""
+
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import multiprocessing as mp
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from async_crawl import CONCURRENCY, RATE, HostRateLimiter
+from extractors import COLUMNS
+from http_fetch import HEADERS, TIMEOUT
+from metrics import METRICS
+from retry import classify
+from state_store import now_utc
+
+IMAGE_DIR = "image_cache"
+THUMB_SIZE = 300
+MAX_PENDING_FACTOR = 4  # so row dang cho anh toi da = concurrency * MAX_PENDING_FACTOR
+IMAGE_COLUMNS = ["image_path", "image_sha256", "image_width", "image_height"]
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif",
+              "image/avif": ".avif", "image/svg+xml": ".svg"}
+
+
+def image_ext(url, content_type=None):
+    if content_type in EXTENSIONS: return EXTENSIONS[content_type]
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    return ".jpg" if ext == ".jpeg" else ext if ext in EXTENSIONS.values() else ".img"
+
+
+def make_thumbnail(src, dst, size=THUMB_SIZE):
+    """Chay trong ProcessPoolExecutor: doc kich thuoc anh goc + ghi thumbnail JPEG. Tra ve (width, height)."""
+    from PIL import Image
+    with Image.open(src) as img:
+        width, height = img.size
+        if not os.path.exists(dst):
+            img.thumbnail((size, size))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            tmp = f"{dst}.{os.getpid()}.tmp"
+            img.convert("RGB").save(tmp, "JPEG", quality=85)
+            os.replace(tmp, dst)
+    return width, height
+
+
+class ImageCache:
+    def __init__(self, root=IMAGE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                ext TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                width INTEGER,
+                height INTEGER,
+                fetched_at TEXT
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_sha ON images (sha256)")
+        self.conn.commit()
+
+    def object_path(self, sha, ext):
+        return os.path.join(self.root, "objects", sha[:2], sha + ext)
+
+    def thumb_path(self, sha, size=THUMB_SIZE):
+        return os.path.join(self.root, "thumbs", sha[:2], f"{sha}_{size}.jpg")
+
+    def get(self, url):
+        return self.conn.execute("SELECT * FROM images WHERE url = ?", (url,)).fetchone()
+
+    def dims(self, sha):
+        rec = self.conn.execute("SELECT width, height FROM images WHERE sha256 = ? AND width IS NOT NULL",
+                                (sha,)).fetchone()
+        return (rec["width"], rec["height"]) if rec else None
+
+    def store(self, data, sha, ext):
+        """Ghi file anh neu chua co. Tra ve False neu noi dung da co (anh trung)."""
+        path = self.object_path(sha, ext)
+        if os.path.exists(path): return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return True
+
+    def put(self, url, sha, ext, etag, last_modified, width, height):
+        self.conn.execute("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                          (url, sha, ext, etag, last_modified, width, height, now_utc()))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ImagePipeline:
+    """
+    Event loop aiohttp chay tren 1 thread rieng, BUOC 2 khong phai cho anh.
+    Khi anh xong, row duoc them IMAGE_COLUMNS roi goi callback(row) (vd sink.write) tren thread nay.
+    Cung 1 image_url trong 1 lan chay chi tai 1 lan.
+    Toi da max_pending row dang cho anh, submit() chi cho khi day -> bo nho khong tang theo so san pham.
+    """
+
+    def __init__(self, root=IMAGE_DIR, concurrency=CONCURRENCY, rate=RATE, thumb_size=THUMB_SIZE, workers=None,
+                 max_pending=None):
+        if importlib.util.find_spec("PIL") is None:  # bao loi ngay tu dau, khong doi den thumbnail dau tien
+            raise ImportError("images.py can pillow: pip install pillow")
+        self.root, self.concurrency, self.rate, self.thumb_size = root, concurrency, rate, thumb_size
+        self.slots = threading.BoundedSemaphore(max_pending or concurrency * MAX_PENDING_FACTOR)
+        self.stats = {"downloaded": 0, "not_modified": 0, "deduped": 0}
+        self.errors = []
+        self.futures = []
+        # spawn: fork tu tien trinh dang co thread event loop khong an toan
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self._call(self._open())
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _open(self):
+        # SQLite / session tao tren thread cua loop, chi dung tren thread nay
+        self.cache = ImageCache(self.root)
+        self.session = aiohttp.ClientSession(headers=HEADERS, timeout=aiohttp.ClientTimeout(total=TIMEOUT))
+        self.limiter = HostRateLimiter(self.rate)
+        self.sem = asyncio.Semaphore(self.concurrency)
+        self.tasks = {}  # image_url -> Task
+
+    def submit(self, row, callback=None):
+        self.slots.acquire()
+        fut = asyncio.run_coroutine_threadsafe(self._process(row, callback), self.loop)
+        fut.add_done_callback(lambda _: self.slots.release())
+        pending = []
+        for f in self.futures:
+            if f.done():
+                f.result()  # loi trong callback (vd sink.write) -> bao ngay
+            else:
+                pending.append(f)
+        self.futures = pending + [fut]
+
+    async def _process(self, row, callback):
+        url = row.get("image_url")
+        info = {}
+        if url and url.startswith("http"):
+            if url not in self.tasks: self.tasks[url] = asyncio.ensure_future(self._fetch_safe(url))
+            info = await self.tasks[url]
+        row.update({col: info.get(col) for col in IMAGE_COLUMNS})
+        if callback is not None: callback(row)
+
+    async def _fetch_safe(self, url):
+        try:
+            return await self._fetch(url)
+        except Exception as e:
+            self.errors.append({"url": url, "error": str(e), "kind": classify(e)})
+            METRICS.error("images", e, url)
+            return {}
+
+    async def _fetch(self, url):
+        rec = self.cache.get(url)
+        headers = {}
+        if rec and os.path.exists(self.cache.object_path(rec["sha256"], rec["ext"])):
+            if rec["etag"]: headers["If-None-Match"] = rec["etag"]
+            if rec["last_modified"]: headers["If-Modified-Since"] = rec["last_modified"]
+        async with self.sem:
+            await self.limiter.acquire(url)
+            with METRICS.timer("image_fetch", url):
+                async with self.session.get(url, headers=headers) as resp:
+                    if resp.status == 304 and headers:
+                        self.stats["not_modified"] += 1
+                        return await self._finish(url, rec["sha256"], rec["ext"], rec["etag"], rec["last_modified"])
+                    resp.raise_for_status()
+                    data = await resp.read()
+                    etag, modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+                    ext = image_ext(url, resp.content_type)
+        self.stats["downloaded"] += 1
+        METRICS.inc("bytes", len(data), stage="images")
+        sha = hashlib.sha256(data).hexdigest()
+        if not self.cache.store(data, sha, ext): self.stats["deduped"] += 1
+        return await self._finish(url, sha, ext, etag, modified)
+
+    async def _finish(self, url, sha, ext, etag, modified):
+        path = self.cache.object_path(sha, ext)
+        thumb = self.cache.thumb_path(sha, self.thumb_size)
+        dims = self.cache.dims(sha)
+        if dims is None or not os.path.exists(thumb):
+            dims = await self.loop.run_in_executor(self.pool, make_thumbnail, path, thumb, self.thumb_size)
+        self.cache.put(url, sha, ext, etag, modified, *dims)
+        return {"image_path": path, "image_sha256": sha, "image_width": dims[0], "image_height": dims[1]}
+
+    async def _close(self):
+        await self.session.close()
+        self.cache.close()
+
+    def close(self):
+        """Cho moi anh dang tai xong (va callback da chay) roi dong loop / pool"""
+        try:
+            for fut in self.futures: fut.result()
+        finally:
+            self._call(self._close())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.pool.shutdown()
+
+    def summary(self):
+        s = self.stats
+        return (f"{len(self.tasks)} anh: tai {s['downloaded']}, khong doi (304) {s['not_modified']}, "
+                f"trung noi dung {s['deduped']}, loi {len(self.errors)}")
+
+
+def download_images(rows, on_done=None, root=IMAGE_DIR, concurrency=CONCURRENCY, rate=RATE,
+                    thumb_size=THUMB_SIZE, workers=None):
+    """Tai anh cho moi row, on_done(row) khi xong. Tra ve (so row, errors)."""
+    pipeline = ImagePipeline(root, concurrency, rate, thumb_size, workers)
+    n = 0
+    try:
+        for row in rows:
+            pipeline.submit(row, on_done)
+            n += 1
+    finally:
+        pipeline.close()
+    print(f"  {pipeline.summary()}")
+    return n, pipeline.errors
+
+
+def main():
+    from sinks import iter_rows, open_sink
+
+    parser = argparse.ArgumentParser(description="Tai anh san pham vao kho content-addressed")
+    parser.add_argument("--from", dest="from_file", required=True, help="file sink (.jsonl/.csv/.parquet)")
+    parser.add_argument("--output", required=True, help="file sink moi co them cot anh")
+    parser.add_argument("--dir", default=IMAGE_DIR)
+    parser.add_argument("--thumb-size", type=int, default=THUMB_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="so tien trinh tao thumbnail")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE)
+    args = parser.parse_args()
+
+    start = time.time()
+    sink = open_sink(args.output, columns=COLUMNS + IMAGE_COLUMNS)
+    try:
+        n, errors = download_images(iter_rows(args.from_file), sink.write, args.dir, args.concurrency, args.rate,
+                                    args.thumb_size, args.workers)
+    finally:
+        sink.close()
+    print(f"{n} san pham, loi anh: {len(errors)}, {time.time() - start:.1f}s -> {args.output}")
+    for err in errors[:5]: print(f"  - {err['url'][:55]}: {err['error'][:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# coding: utf-8
+"""
+Journal append-only (JSONL) de crawl dai khong mat du lieu khi crash.
+
+Moi dong 1 ban ghi, ghi + flush ngay khi xu ly xong (tien trinh crash khong mat dong nao),
+fsync gom lai toi da 1 lan / SYNC_INTERVAL giay (khong chan event loop cua mode async moi row):
+    {"type": "links", "urls": [...]}                 # ket qua BUOC 1
+    {"type": "row", "url": ..., "row": {...}}        # cao thanh cong
+    {"type": "error", "url": ..., "error": "..."}    # loi
+
+--resume doc lai journal: khong can BUOC 1, chi cao cac link chua co row
+(link loi lan truoc duoc cao lai). Xuat xong output thi crawl.py xoa journal,
+URL loi nam trong file *_errors.jsonl (--retry-from).
+"""
+
+import json
+import os
+import time
+
+JOURNAL_FILE = "crawl_journal.jsonl"
+SYNC_INTERVAL = 1.0  # giay
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class Journal:
+    def __init__(self, path=JOURNAL_FILE, append=False):
+        self.path = path
+        torn = append and os.path.exists(path) and os.path.getsize(path) and not _ends_with_newline(path)
+        self.f = open(path, "a" if append else "w", encoding="utf-8")
+        if torn: self.f.write("\n")  # dong cuoi bi cat do crash -> khong noi vao ban ghi moi
+        self.synced = time.monotonic()
+
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.f.flush()
+        if time.monotonic() - self.synced >= SYNC_INTERVAL: self.sync()
+
+    def sync(self):
+        os.fsync(self.f.fileno())
+        self.synced = time.monotonic()
+
+    def links(self, urls):
+        self.write({"type": "links", "urls": list(urls)})
+
+    def row(self, url, row):
+        self.write({"type": "row", "url": url, "row": row})
+
+    def error(self, url, error):
+        self.write({"type": "error", "url": url, "error": error})
+
+    def close(self):
+        self.sync()
+        self.f.close()
+
+
+def load(path=JOURNAL_FILE):
+    """
+    Doc journal, tra ve (links, rows, errors):
+    rows / errors la dict url -> row / loi (ban ghi sau de len ban ghi truoc).
+    Dong cuoi bi ghi do dang (crash giua chung) duoc bo qua.
+    """
+    links, rows, errors = [], {}, {}
+    if not os.path.exists(path): return links, rows, errors
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec["type"] == "links":
+                links = rec["urls"]
+            elif rec["type"] == "row":
+                rows[rec["url"]] = rec["row"]
+                errors.pop(rec["url"], None)
+            elif rec["type"] == "error" and rec["url"] not in rows:
+                errors[rec["url"]] = rec["error"]
+    return links, rows, errors
+
+
+def pending(links, rows):
+    """Link da tim thay nhung chua co row"""
+    return [url for url in links if url not in rows]
@@ -0,0 +1,40 @@
+# coding: utf-8
+"""
+Trich xuat 1 san pham bang 1 lan execute_script (extract_product.js).
+
+Danh sach strategy gui vao script sinh tu rules.RULES (js_rules): script chi lay gia tri tho
+cua tung strategy trong trang, thu tu fallback / hau xu ly / RuleStats van do ENGINE chay
+(extract_raw) -> row giong extractors.extract_product. Dung duoc voi moi webdriver.Chrome,
+ke ca Options() cua final-craw.py:
+
+    from js_extract import extract_product_js
+    row = extract_product_js(driver, url)
+
+So voi extractor Python tren bo trang mau (can Chrome): python scripts/bench.py --js
+"""
+
+import os
+from functools import lru_cache
+
+from rules import ENGINE
+
+JS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "extract_product.js")
+
+
+@lru_cache(maxsize=None)
+def load_script():
+    with open(JS_FILE, encoding="utf-8") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def script_rules():
+    return ENGINE.js_rules()
+
+
+def run_script(driver):
+    return driver.execute_script(load_script(), script_rules())
+
+
+def extract_product_js(driver, url):
+    return ENGINE.extract_raw(run_script(driver), url)
@@ -0,0 +1,133 @@
+# coding: utf-8
+"""
+Metrics tung stage / tung trang: discovery, fetch, navigation, wait, extract (tung truong),
+retry, loi theo loai exception, bytes, export.
+
+    METRICS.open("metrics.jsonl")            # crawl.py --metrics metrics.jsonl
+    with METRICS.timer("fetch", url): ...
+    METRICS.inc("bytes", len(body), stage="fetch")
+    METRICS.gauge("crawl_concurrency_limit", limit)   # gia tri hien tai, ghi de lan truoc
+    METRICS.error("detail", exc, url)
+    METRICS.write_prom("vuadocau.prom")      # textfile cho node_exporter
+    print(METRICS.summary())                 # p50 / p95 / p99 cuoi run
+
+Chua open() thi moi ham deu bo qua (khong ton bo nho / IO).
+"""
+
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+QUANTILES = [50, 95, 99]
+PREFIX = "vuadocau"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values: return 0.0
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _label_str(labels):
+    return ",".join(f'{k}="{str(v)}"' for k, v in labels)
+
+
+class Metrics:
+    def __init__(self):
+        self.f = None
+        self.timings = defaultdict(list)
+        self.counters = defaultdict(float)
+        self.gauges = {}
+        self.started = time.time()
+
+    @property
+    def enabled(self):
+        return self.f is not None
+
+    def open(self, path):
+        self.f = open(path, "a", encoding="utf-8")
+        self.started = time.time()
+
+    def _write(self, record):
+        record["ts"] = round(time.time(), 3)
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def observe(self, stage, seconds, url=None, **labels):
+        if not self.enabled: return
+        self.timings[_key(stage, labels)].append(seconds)
+        self._write({"type": "timing", "stage": stage, "seconds": round(seconds, 6), "url": url, **labels})
+
+    @contextmanager
+    def timer(self, stage, url=None, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, url, **labels)
+
+    def inc(self, name, value=1, url=None, **labels):
+        if not self.enabled: return
+        self.counters[_key(name, labels)] += value
+        self._write({"type": "counter", "name": name, "value": value, "url": url, **labels})
+
+    def gauge(self, name, value, **labels):
+        if not self.enabled: return
+        self.gauges[_key(name, labels)] = value
+        self._write({"type": "gauge", "name": name, "value": value, **labels})
+
+    def error(self, stage, exc, url=None):
+        """exc: exception hoac ten loai (tu tien trinh con)"""
+        name = exc if isinstance(exc, str) else type(exc).__name__
+        self.inc("errors", url=url, stage=stage, type=name)
+
+    def summary(self):
+        lines = [f"{'stage':<44} {'n':>6} {'tong s':>8} " + " ".join(f"{f'p{q} ms':>9}" for q in QUANTILES)]
+        for (stage, labels), values in sorted(self.timings.items()):
+            name = stage + (f"[{_label_str(labels)}]" if labels else "")
+            lines.append(f"{name[:44]:<44} {len(values):>6} {sum(values):>8.2f} "
+                         + " ".join(f"{percentile(values, q) * 1000:>9.2f}" for q in QUANTILES))
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f"{name}{{{_label_str(labels)}}} = {value:g}")
+        for (name, labels), value in sorted(self.gauges.items()):
+            lines.append(f"{name}{{{_label_str(labels)}}} = {value:g} (cuoi run)")
+        return "\n".join(lines)
+
+    def write_prom(self, path):
+        """Prometheus text format, ghi tmp roi rename (node_exporter khong doc file ghi do)"""
+        lines = [f"# HELP {PREFIX}_stage_seconds Thoi gian tung stage / trang",
+                 f"# TYPE {PREFIX}_stage_seconds summary"]
+        for (stage, labels), values in sorted(self.timings.items()):
+            base = _label_str((("stage", stage),) + labels)
+            for q in QUANTILES:
+                lines.append(f'{PREFIX}_stage_seconds{{{base},quantile="{q / 100}"}} {percentile(values, q):.6f}')
+            lines.append(f"{PREFIX}_stage_seconds_sum{{{base}}} {sum(values):.6f}")
+            lines.append(f"{PREFIX}_stage_seconds_count{{{base}}} {len(values)}")
+        for name in sorted({name for name, _ in self.counters}):
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            for (n, labels), value in sorted(self.counters.items()):
+                if n == name: lines.append(f"{PREFIX}_{name}_total{{{_label_str(labels)}}} {value:g}")
+        for name in sorted({name for name, _ in self.gauges}):
+            lines.append(f"# TYPE {PREFIX}_{name} gauge")
+            for (n, labels), value in sorted(self.gauges.items()):
+                if n == name: lines.append(f"{PREFIX}_{name}{{{_label_str(labels)}}} {value:g}")
+        lines += [f"# TYPE {PREFIX}_run_seconds gauge", f"{PREFIX}_run_seconds {time.time() - self.started:.1f}",
+                  f"# TYPE {PREFIX}_last_run_timestamp_seconds gauge",
+                  f"{PREFIX}_last_run_timestamp_seconds {time.time():.0f}"]
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+
+METRICS = Metrics()
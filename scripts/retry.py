@@ -0,0 +1,146 @@
+# coding: utf-8
+"""
+Hang doi thu lai cho cac URL loi o BUOC 2.
+
+Loi duoc chia 2 loai:
+    transient   timeout, mat ket noi, HTTP 408 / 429 / 5xx, Chrome treo -> thu lai sau
+    permanent   HTTP 404 / 410 / 4xx khac, loi parse -> thu lai cung khong khac
+
+URL loi transient duoc xep lai hang doi voi backoff luy thua co jitter (BASE_DELAY * 2^(n-1),
+x0.5..1.5 de cac URL khong cung thu lai 1 luc). Het MAX_ATTEMPTS ma van loi -> ghi vao file loi:
+    python scripts/crawl.py --retry-from vuadocau_..._errors.jsonl   # chi cao lai cac URL nay
+"""
+
+import json
+import random
+import time
+
+MAX_ATTEMPTS = 3
+BASE_DELAY = 5.0  # giay
+MAX_DELAY = 120.0
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+TRANSIENT_STATUS = {408, 425, 429}
+# Ten loai exception (ca lop cha) cua requests / aiohttp / selenium / socket
+TRANSIENT_TYPES = {"TimeoutError", "Timeout", "ConnectionError", "ChunkedEncodingError", "ClientConnectionError",
+                   "ClientPayloadError", "ServerDisconnectedError", "TimeoutException", "WebDriverException",
+                   "IncompleteRead", "RemoteDisconnected", "ConnectionResetError"}
+PERMANENT_TYPES = {"NoSuchElementException", "InvalidArgumentException", "InvalidURL", "MissingSchema",
+                   "InvalidSchema", "WorkerDied"}
+
+
+def _status(exc):
+    status = getattr(exc, "status", None)
+    if status is None: status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify(exc):
+    """exc: exception (xet ca lop cha) hoac ten loai cua chinh no, vd "WorkerDied" -> TRANSIENT / PERMANENT"""
+    if isinstance(exc, str):
+        names = [exc]
+    else:
+        status = _status(exc)
+        if status is not None:
+            return TRANSIENT if status in TRANSIENT_STATUS or status >= 500 else PERMANENT
+        names = [cls.__name__ for cls in type(exc).__mro__]
+    for name in names:
+        if name in PERMANENT_TYPES: return PERMANENT
+        if name in TRANSIENT_TYPES: return TRANSIENT
+    return PERMANENT
+
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY):
+    """Lan thu lai thu attempt (1, 2, ...): base * 2^(attempt-1), toi da cap, jitter x0.5..1.5"""
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+
+class RetryQueue:
+    """
+    add(errors) sau moi luot cao, due() lay cac URL da het thoi gian cho.
+    Loi permanent / het so lan thu giu lai trong failed (url -> error dict).
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base=BASE_DELAY, cap=MAX_DELAY):
+        self.max_attempts = max_attempts
+        self.base, self.cap = base, cap
+        self.attempts = {}
+        self.waiting = {}  # url -> thoi diem duoc thu lai (time.monotonic)
+        self.failed = {}
+        self.last = {}  # url -> loi gan nhat
+        self.retried = 0
+
+    def add(self, errors):
+        for err in errors:
+            url = err["url"]
+            n = self.attempts.get(url, 0) + 1
+            self.attempts[url] = n
+            err = {**err, "kind": err.get("kind", PERMANENT), "attempts": n}
+            self.last[url] = err
+            if err["kind"] == TRANSIENT and n < self.max_attempts:
+                self.waiting[url] = time.monotonic() + backoff_delay(n, self.base, self.cap)
+                self.failed.pop(url, None)
+            else:
+                self.failed[url] = err
+
+    def resolved(self, url):
+        """URL thu lai da co row"""
+        self.failed.pop(url, None)
+
+    def __len__(self):
+        return len(self.waiting)
+
+    def next_at(self):
+        """Moc time.monotonic som nhat co URL toi han"""
+        return min(self.waiting.values())
+
+    def give_up(self, urls=None):
+        """Het thoi gian: URL dang cho (hoac urls chua kip thu lai) tinh la loi, giu loi gan nhat"""
+        for url in list(self.waiting) if urls is None else urls:
+            self.waiting.pop(url, None)
+            self.failed[url] = self.last[url]
+
+    def due(self):
+        """Cho den khi co URL toi han (ngu den moc som nhat), tra ve tat ca URL da toi han"""
+        if not self.waiting: return []
+        wait = min(self.waiting.values()) - time.monotonic()
+        if wait > 0: time.sleep(wait)
+        now = time.monotonic()
+        urls = [url for url, ready in self.waiting.items() if ready <= now]
+        for url in urls: del self.waiting[url]
+        self.retried += len(urls)
+        return urls
+
+    def transient_left(self):
+        return [err for err in self.failed.values() if err["kind"] == TRANSIENT]
+
+    def errors(self):
+        return list(self.failed.values())
+
+
+# ===== FILE LOI =====
+def save_errors(path, errors):
+    with open(path, "w", encoding="utf-8") as f:
+        for err in errors:
+            f.write(json.dumps(err, ensure_ascii=False) + "\n")
+
+
+def load_errors(path):
+    """
+    URL loi tu file loi (save_errors) hoac journal (ban ghi type "error" chua co row sau do).
+    Tra ve [url], giu thu tu, khong trung.
+    """
+    urls, done = {}, set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("type") == "row":
+                done.add(rec["url"])
+            elif rec.get("url") and "error" in rec:
+                urls[rec["url"]] = True
+    return [url for url in urls if url not in done]
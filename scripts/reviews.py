@@ -0,0 +1,287 @@
+# coding: utf-8
+"""
+Thu thap toan bo danh gia (reviewer, ngay, so sao, noi dung) cua moi san pham
+thay vi chi first_comment. Luu vao bang reviews rieng (reviews.db), khoa product_url + review_id.
+
+Nguon:
+    Store API  {site}/wp-json/wc/store/v1/products/reviews?product_id=..&per_page=100 (JSON, moi nhat truoc)
+    HTML       ol.commentlist cua trang san pham + cac trang /comment-page-N/ (khi API bi tat)
+Moi request (ca cac trang cua nhieu san pham) chay song song qua aiohttp, gioi han rate theo host.
+
+Incremental: chi cao san pham co count_rate lon hon so danh gia da luu, dung doc API khi gap
+danh gia da co.
+    python scripts/reviews.py                         # san pham trong crawl_state.db
+    python scripts/reviews.py --from vuadocau.jsonl   # hoac file sink / file 1 URL moi dong
+    python scripts/crawl.py --sink out.jsonl --reviews
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+import aiohttp
+from selenium.webdriver.common.by import By
+
+from async_crawl import CONCURRENCY, RATE, HostRateLimiter
+from extractors import HtmlPage, strip_html
+from http_fetch import HEADERS, TIMEOUT
+from metrics import METRICS
+from state_store import now_utc
+from store_api import PER_PAGE, api_url
+
+REVIEWS_DB = "reviews.db"
+REVIEW_SELECTOR = "ol.commentlist li.review"
+API_UNUSABLE = {400, 401, 403, 404}  # Store API tra cac ma nay -> dung HTML cho ca host
+PRODUCT_ID_SELECTORS = [("button[name='add-to-cart']", "value"), ("input[name='add-to-cart']", "value"),
+                        ("form.cart", "data-product_id"), ("form.variations_form", "data-product_id")]
+
+
+class ReviewStore:
+    def __init__(self, path=REVIEWS_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reviews (
+                product_url TEXT NOT NULL,
+                review_id TEXT NOT NULL,
+                reviewer TEXT,
+                date TEXT,
+                rating REAL,
+                text TEXT,
+                verified INTEGER,
+                source TEXT,
+                fetched_at TEXT,
+                PRIMARY KEY (product_url, review_id)
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS review_products (
+                product_url TEXT PRIMARY KEY,
+                product_id TEXT,
+                fetched_at TEXT
+            )""")
+        self.conn.commit()
+
+    def known_ids(self, url):
+        return {r[0] for r in self.conn.execute("SELECT review_id FROM reviews WHERE product_url = ?", (url,))}
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT product_url, COUNT(*) FROM reviews GROUP BY product_url").fetchall())
+
+    def product_id(self, url):
+        rec = self.conn.execute("SELECT product_id FROM review_products WHERE product_url = ?", (url,)).fetchone()
+        return rec[0] if rec else None
+
+    def add(self, url, reviews, product_id=None, source=None):
+        """Luu danh gia moi (trung review_id -> bo qua). Tra ve so danh gia them."""
+        now = now_utc()
+        before = self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+            (url, r["review_id"], r["reviewer"], r["date"], r["rating"], r["text"], r["verified"], source, now)
+            for r in reviews))
+        added = self.conn.total_changes - before
+        self.conn.execute("""
+            INSERT INTO review_products VALUES (?, ?, ?)
+            ON CONFLICT(product_url) DO UPDATE SET product_id = COALESCE(excluded.product_id, product_id),
+                                                   fetched_at = excluded.fetched_at""", (url, product_id, now))
+        self.conn.commit()
+        return added
+
+    def close(self):
+        self.conn.close()
+
+
+# ===== PARSE =====
+def _first(el, sel, attr=None):
+    found = el.find_elements(By.CSS_SELECTOR, sel)
+    if not found: return None
+    return found[0].get_attribute(attr) if attr else found[0].text.strip()
+
+
+def _number(text):
+    m = re.search(r"([\d.]+)", text or "")
+    return float(m.group(1)) if m else None
+
+
+def parse_reviews(page):
+    """Danh gia tren 1 trang HTML (trang san pham hoac /comment-page-N/)"""
+    reviews = []
+    for li in page.find_elements(By.CSS_SELECTOR, REVIEW_SELECTOR):
+        review_id = (li.get_attribute("id") or "").replace("li-comment-", "")
+        text = _first(li, "div.description") or _first(li, "p:not(.meta)")
+        if not review_id and not text: continue
+        reviews.append({
+            "review_id": review_id or "h" + hashlib.sha1((text or "").encode("utf-8")).hexdigest()[:12],
+            "reviewer": _first(li, ".woocommerce-review__author"),
+            "date": _first(li, "time", "datetime") or _first(li, ".woocommerce-review__published-date"),
+            "rating": _number(_first(li, ".star-rating", "aria-label") or _first(li, ".star-rating strong.rating")),
+            "text": text,
+            "verified": int(bool(li.find_elements(By.CSS_SELECTOR, ".woocommerce-review__verified"))),
+        })
+    return reviews
+
+
+def review_page_urls(page, product_url):
+    """/comment-page-2/ ... /comment-page-N/ theo so trang lon nhat trong phan trang danh gia"""
+    last = 1
+    for a in page.find_elements(By.CSS_SELECTOR, "#reviews a.page-numbers, #comments a.page-numbers, "
+                                                 "a[href*='comment-page-']"):
+        m = re.search(r"comment-page-(\d+)", a.get_attribute("href") or "")
+        if m: last = max(last, int(m.group(1)))
+    base = product_url.split("#")[0].split("?")[0].rstrip("/")
+    return [f"{base}/comment-page-{n}/" for n in range(2, last + 1)]
+
+
+def product_id(page):
+    for sel, attr in PRODUCT_ID_SELECTORS:
+        val = _first(page, sel, attr)
+        if val and val.isdigit(): return val
+    for el in page.find_elements(By.CSS_SELECTOR, "div[id^='product-']"):
+        m = re.match(r"product-(\d+)$", el.get_attribute("id") or "")
+        if m: return m.group(1)
+    return None
+
+
+def map_api_review(r):
+    return {"review_id": str(r.get("id")), "reviewer": r.get("reviewer"),
+            "date": r.get("date_created_gmt") or r.get("date_created"), "rating": r.get("rating"),
+            "text": strip_html(r.get("review")), "verified": int(bool(r.get("verified")))}
+
+
+# ===== FETCH =====
+class Harvester:
+    def __init__(self, session, store, concurrency=CONCURRENCY, rate=RATE):
+        self.session = session
+        self.store = store
+        self.limiter = HostRateLimiter(rate)
+        self.sem = asyncio.Semaphore(concurrency)
+        self.api_ok = {}  # host -> Store API reviews co dung duoc khong
+        self.requests = 0
+
+    async def get(self, url, params=None, as_json=False):
+        async with self.sem:
+            await self.limiter.acquire(url)
+            self.requests += 1
+            with METRICS.timer("reviews_fetch", url):
+                async with self.session.get(url, params=params) as resp:
+                    resp.raise_for_status()
+                    if as_json:
+                        return await resp.json(content_type=None), resp.headers.get("X-WP-TotalPages")
+                    return HtmlPage(await resp.text(), base_url=str(resp.url)), None
+
+    async def from_api(self, url, pid, known):
+        """Doc API moi nhat truoc, dung khi gap danh gia da co. None = API khong dung duoc."""
+        endpoint = api_url(url) + "/reviews"
+        params = {"product_id": pid, "per_page": PER_PAGE, "orderby": "date", "order": "desc"}
+        try:
+            data, total = await self.get(endpoint, {**params, "page": 1}, as_json=True)
+        except aiohttp.ClientResponseError as e:
+            if e.status in API_UNUSABLE: return None  # 400: tham so khong ho tro (ban WooCommerce khac)
+            raise
+        pages = [[map_api_review(r) for r in data]]
+        if all(r["review_id"] not in known for r in pages[0]) and total and int(total) > 1:
+            # chua gap danh gia cu -> tai cac trang con lai cung luc
+            more = await asyncio.gather(*(self.get(endpoint, {**params, "page": n}, as_json=True)
+                                          for n in range(2, int(total) + 1)))
+            pages += [[map_api_review(r) for r in data] for data, _ in more]
+        return [r for page in pages for r in page]
+
+    async def from_html(self, url, page, known):
+        reviews = parse_reviews(page)
+        if known and reviews and all(r["review_id"] in known for r in reviews): return reviews
+        more = await asyncio.gather(*(self.get(u) for u in review_page_urls(page, url)))
+        return reviews + [r for p, _ in more for r in parse_reviews(p)]
+
+    async def harvest(self, url):
+        """Tra ve (url, so danh gia moi, source)"""
+        known = self.store.known_ids(url)
+        pid, page = self.store.product_id(url), None
+        if pid is None:
+            page, _ = await self.get(url)
+            pid = product_id(page)
+        host = url.split("/")[2]
+        reviews = None
+        if pid and self.api_ok.get(host, True):
+            reviews = await self.from_api(url, pid, known)
+            if reviews is None: self.api_ok[host] = False
+        source = "api"
+        if reviews is None:
+            if page is None: page, _ = await self.get(url)
+            reviews, source = await self.from_html(url, page, known), "html"
+        return url, self.store.add(url, reviews, pid, source), source
+
+
+async def _harvest(urls, store, concurrency, rate):
+    errors, added = [], 0
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout) as session:
+        harvester = Harvester(session, store, concurrency, rate)
+        results = await asyncio.gather(*(harvester.harvest(url) for url in urls), return_exceptions=True)
+    for url, res in zip(urls, results):
+        if isinstance(res, Exception):
+            errors.append({"url": url, "error": str(res)})
+            METRICS.error("reviews", res, url)
+        else:
+            added += res[1]
+    return added, errors, harvester.requests
+
+
+def to_fetch(rows, store):
+    """Chi san pham co count_rate lon hon so danh gia da luu"""
+    counts = store.counts()
+    urls = []
+    for row in rows:
+        n = int(_number(str(row.get("count_rate") or "")) or 0)
+        if n > counts.get(row["product_url"], 0): urls.append(row["product_url"])
+    return list(dict.fromkeys(urls))
+
+
+def harvest_reviews(rows, path=REVIEWS_DB, concurrency=CONCURRENCY, rate=RATE):
+    """rows: iterable dict co product_url + count_rate. Tra ve (so danh gia moi, errors)."""
+    store = ReviewStore(path)
+    try:
+        urls = to_fetch(rows, store)
+        print(f"  Danh gia: {len(urls)} san pham co danh gia moi")
+        if not urls: return 0, []
+        start = time.time()
+        added, errors, n_requests = asyncio.run(_harvest(urls, store, concurrency, rate))
+        print(f"  +{added} danh gia, {n_requests} request, loi: {len(errors)}, {time.time() - start:.1f}s")
+        return added, errors
+    finally:
+        store.close()
+
+
+def _load_rows(path, state_db):
+    if path is None:
+        conn = sqlite3.connect(state_db)
+        try:
+            return [json.loads(r[0]) for r in conn.execute("SELECT row_json FROM pages WHERE row_json IS NOT NULL")]
+        finally:
+            conn.close()
+    if path.endswith(".txt"):
+        # chi co URL: khong biet count_rate -> cao tat ca
+        with open(path, encoding="utf-8") as f:
+            return [{"product_url": line.strip(), "count_rate": "999999"} for line in f if line.strip()]
+    from sinks import iter_rows
+    return list(iter_rows(path))
+
+
+def main():
+    from state_store import STATE_DB
+
+    parser = argparse.ArgumentParser(description="Thu thap toan bo danh gia san pham")
+    parser.add_argument("--from", dest="from_file", help="file sink (.jsonl/.csv/.parquet) hoac .txt 1 URL / dong")
+    parser.add_argument("--state-db", default=STATE_DB, help="mac dinh: lay san pham tu crawl_state.db")
+    parser.add_argument("--db", default=REVIEWS_DB)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE)
+    args = parser.parse_args()
+
+    added, errors = harvest_reviews(_load_rows(args.from_file, args.state_db), args.db, args.concurrency, args.rate)
+    for err in errors[:5]: print(f"  - {err['url'][:55]}: {err['error'][:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+# coding: utf-8
+"""
+Rule engine trich xuat: moi truong khai bao 1 lan danh sach strategy (RULES),
+selector / regex / XPath duoc compile 1 lan khi tao engine, chay lan luot va
+dung o strategy dau tien co ket qua.
+
+Dem so lan thu / trung va thoi gian tung strategy (RuleStats) de bo cac
+strategy khong bao gio trung ma trang nao cung phai chay:
+    python scripts/rules.py html_archive          # chay tren kho HTML (archive.py)
+    python scripts/rules.py page1.html page2.html
+"""
+
+import json
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+from extractors import (PRICE_SELECTORS, SWATCH_SELECTORS, HtmlElement, HtmlPage, color_from_gp_codes,
+                        color_from_title, colors_from_description, colors_from_variations, join_size_price,
+                        price_from_text, size_price_from_variations, snapshot, swatch_label)
+from metrics import METRICS
+
+DESCRIPTION = "div.woocommerce-product-details__short-description"
+
+
+def _joined(colors):
+    return " | ".join(dict.fromkeys(colors)) if colors else None
+
+
+def _price_only(text):
+    price = price_from_text(text)
+    return (None, price) if price else None
+
+
+def _size_price(variations):
+    size, price = join_size_price(size_price_from_variations(variations))
+    return (size, price) if price else None
+
+
+def _not_placeholder(url):
+    """Anh lazy-load: src la placeholder data:..., anh that nam o data-src"""
+    return None if url.startswith("data:") else url
+
+
+def _swatch_colors(items):
+    return _joined([c for c in (swatch_label(it["text"], it["title"], it["value"]) for it in items) if c])
+
+
+def _vnd_price(matches):
+    for match in matches:
+        price = price_from_text(match, 1000)
+        if price: return None, price
+    return None
+
+
+# ===== RULES =====
+# field -> [(ten strategy, loai, tham so)]. Loai:
+#   text        text cua phan tu dau tien khop "css"
+#   attr        thuoc tinh dau tien co gia tri trong "attrs" cua phan tu dau tien khop "css"
+#   source      re.search "pattern" tren page_source (group 1, khong co group thi ca chuoi khop)
+#   source_all  re.findall "pattern" tren page_source
+#   xpath_text  re.search "pattern" tren text cac phan tu khop "xpath"
+#   variations  data-product_variations (parse 1 lan / trang, dung chung size_price va color)
+#   swatches    {text, title, value} cua cac phan tu khop "css"
+# "regex": re.search tren gia tri, lay group 1. "then": ham hau xu ly, tra None = khong trung.
+# extract_product.js chay cung cac loai nay trong trang (js_rules), regex / then / thu tu van chay o Python.
+RULES = {
+    "name": [
+        ("h1", "text", {"css": "h1"}),
+    ],
+    "short_description": [
+        ("short_description", "text", {"css": DESCRIPTION}),
+    ],
+    "image_url": [
+        ("wp_post_image", "attr", {"css": "img.wp-post-image", "attrs": ["data-src", "src"],
+                                   "then": _not_placeholder}),
+        ("gallery_img", "attr", {"css": "figure.woocommerce-product-gallery__wrapper img",
+                                 "attrs": ["data-src", "src"], "then": _not_placeholder}),
+    ],
+    "rating_score": [
+        ("star_aria_label", "attr", {"css": "div.star-rating", "attrs": ["aria-label"], "regex": r"([\d.]+)"}),
+    ],
+    "count_rate": [
+        ("review_link", "text", {"css": "a.woocommerce-review-link", "regex": r"(\d+)"}),
+    ],
+    "first_comment": [
+        # p.meta la dong ten nguoi danh gia, noi dung nam trong div.description
+        ("first_review", "text", {"css": "ol.commentlist li.review:first-child div.description"}),
+        ("first_review_p", "text", {"css": "ol.commentlist li.review:first-child p:not(.meta)"}),
+    ],
+    "sold_count": [
+        ("source_da_ban", "source", {"pattern": r"(\d+)\s*đã\s*bán", "flags": re.IGNORECASE}),
+        ("source_sold", "source", {"pattern": r"sold[:\s]*(\d+)", "flags": re.IGNORECASE}),
+        ("text_da_ban", "xpath_text", {"xpath": "//*[contains(translate(text(),'ĐÃ','đã'),'đã bán')]",
+                                       "pattern": r"(\d+)\s*đã\s*bán"}),
+    ],
+    # (size, price)
+    "size_price": [
+        ("variations", "variations", {"then": _size_price}),
+        *[(f"price:{sel}", "text", {"css": sel, "then": _price_only}) for sel in PRICE_SELECTORS],
+        ("source_vnd", "source_all", {"pattern": r"([\d,\.]+)\s*VN[DĐ]", "then": _vnd_price}),
+    ],
+    "color": [
+        *[(f"swatch:{sel}", "swatches", {"css": sel, "then": _swatch_colors}) for sel in SWATCH_SELECTORS],
+        ("variations", "variations", {"then": lambda v: _joined(colors_from_variations(v))}),
+        ("description", "text", {"css": DESCRIPTION, "then": lambda d: _joined(colors_from_description(d))}),
+        ("source_gp", "source_all", {"pattern": r"GP-\d+", "flags": re.IGNORECASE, "then": color_from_gp_codes}),
+        ("title_gp", "text", {"css": "h1", "then": color_from_title}),
+    ],
+}
+
+
+# ===== CONTEXT (1 trang) =====
+_VARIATIONS_FORM = CSSSelector("form.variations_form")
+
+
+class PageContext:
+    """Trang da parse + cac gia tri dung chung giua strategy (page_source, variations)"""
+
+    def __init__(self, page):
+        self.page = snapshot(page)
+        self.root = self.page._root
+        self.source = self.page.page_source
+        self._variations = False
+
+    @property
+    def variations(self):
+        if self._variations is False:
+            self._variations = None
+            forms = _VARIATIONS_FORM(self.root)
+            data = forms[0].get("data-product_variations") if forms else None
+            if data: self._variations = json.loads(data)
+        return self._variations
+
+
+# ===== COMPILE =====
+def _elements(nodes):
+    return [HtmlElement(n) for n in nodes if isinstance(getattr(n, "tag", None), str)]
+
+
+def _compile(kind, params):
+    """Strategy -> (ham (ctx) -> gia tri tho, ham hau xu ly regex / then hoac None). None = khong trung."""
+    if kind == "text":
+        sel = CSSSelector(params["css"])
+
+        def run(ctx):
+            found = _elements(sel(ctx.root))
+            return found[0].text.strip() if found else None
+    elif kind == "attr":
+        sel, attrs = CSSSelector(params["css"]), params["attrs"]
+
+        def run(ctx):
+            found = _elements(sel(ctx.root))
+            if not found: return None
+            for name in attrs:
+                val = found[0].get_attribute(name)
+                if val: return val
+            return None
+    elif kind == "source":
+        pattern = re.compile(params["pattern"], params.get("flags", 0))
+
+        def run(ctx):
+            m = pattern.search(ctx.source)
+            return m and m.group(1 if pattern.groups else 0)
+    elif kind == "source_all":
+        pattern = re.compile(params["pattern"], params.get("flags", 0))
+
+        def run(ctx):
+            return pattern.findall(ctx.source) or None
+    elif kind == "xpath_text":
+        xpath, pattern = etree.XPath(params["xpath"]), re.compile(params["pattern"])
+
+        def run(ctx):
+            for el in _elements(xpath(ctx.root)):
+                m = pattern.search(el.text)
+                if m: return m.group(1)
+            return None
+    elif kind == "variations":
+        def run(ctx):
+            return ctx.variations or None
+    elif kind == "swatches":
+        sel = CSSSelector(params["css"])
+
+        def run(ctx):
+            return [{"text": el.text.strip(),
+                     "title": el.get_attribute("title") or el.get_attribute("data-value") or "",
+                     "value": el.get_attribute("value") or ""} for el in _elements(sel(ctx.root))]
+    else:
+        raise ValueError(f"Khong ho tro loai strategy: {kind}")
+
+    regex = re.compile(params["regex"]) if "regex" in params else None
+    then = params.get("then")
+    if regex is None and then is None: return run, None
+
+    def post(val):
+        if val is not None and regex is not None:
+            m = regex.search(val)
+            val = m.group(1) if m else None
+        if val is not None and then is not None:
+            val = then(val)
+        return val
+    return run, post
+
+
+_JS_FLAGS = {re.IGNORECASE: "i"}
+
+
+def js_rules(rules=RULES):
+    """RULES -> danh sach strategy cho extract_product.js (bo "then" / "regex", flags doi sang JS)"""
+    specs = []
+    for field, strategies in rules.items():
+        for name, kind, params in strategies:
+            spec = {key: val for key, val in params.items() if key not in ("then", "regex", "flags")}
+            flags = params.get("flags", 0)
+            if flags & ~re.IGNORECASE: raise ValueError(f"Flags regex khong doi sang JS duoc: {field}/{name}")
+            spec.update(field=field, name=name, kind=kind, flags="iu" if flags else "u")
+            specs.append(spec)
+    return specs
+
+
+# ===== ENGINE =====
+class RuleStats:
+    def __init__(self):
+        self.tries = Counter()
+        self.hits = Counter()
+        self.seconds = defaultdict(float)
+        self.order = []
+
+    def add(self, key, hit, seconds):
+        if key not in self.tries: self.order.append(key)
+        self.tries[key] += 1
+        self.hits[key] += hit
+        self.seconds[key] += seconds
+
+    def dead(self):
+        """Strategy da chay nhung chua trung lan nao"""
+        return [key for key in self.order if not self.hits[key]]
+
+    def report(self):
+        lines = [f"{'field':<18} {'strategy':<55} {'thu':>6} {'trung':>6} {'ms/lan':>7} {'tong s':>7}"]
+        fields = list(dict.fromkeys(field for field, _ in self.order))
+        for field, name in sorted(self.order, key=lambda key: fields.index(key[0])):
+            key = (field, name)
+            avg = self.seconds[key] / self.tries[key] * 1000
+            mark = "  <- chua trung" if not self.hits[key] else ""
+            lines.append(f"{field:<18} {name[:55]:<55} {self.tries[key]:>6} {self.hits[key]:>6} "
+                         f"{avg:>7.2f} {self.seconds[key]:>7.2f}{mark}")
+        return "\n".join(lines)
+
+
+class RuleEngine:
+    def __init__(self, rules=RULES):
+        self.spec = rules
+        self.rules = {field: [(name, *_compile(kind, params)) for name, kind, params in strategies]
+                      for field, strategies in rules.items()}
+        self.stats = RuleStats()
+
+    def _run(self, field, probe_value, url):
+        """Thu lan luot cac strategy cua 1 truong, dung o strategy dau tien co ket qua"""
+        val, total = None, 0.0
+        for name, probe, post in self.rules[field]:
+            start = time.perf_counter()
+            try:
+                val = probe_value(name, probe)
+                if post is not None: val = post(val)
+            except:
+                val = None
+            elapsed = time.perf_counter() - start
+            total += elapsed
+            self.stats.add((field, name), val is not None, elapsed)
+            if val is not None: break
+        METRICS.observe("extract_field", total, url, field=field)
+        return val
+
+    def field(self, page, field, ctx=None, url=None):
+        if ctx is None: ctx = PageContext(page)
+        return self._run(field, lambda name, probe: probe(ctx), url)
+
+    def field_from(self, raw, field, url=None):
+        """Giong field() nhung gia tri tho lay tu ket qua extract_product.js: raw[field][ten strategy]"""
+        values = raw.get(field) or {}
+        return self._run(field, lambda name, probe: values.get(name), url)
+
+    def _row(self, get, url):
+        size, price = get("size_price") or (None, None)
+        return {
+            "name": get("name"), "size": size, "price": price, "color": get("color"),
+            "rating_score": get("rating_score"), "count_rate": get("count_rate"),
+            "sold_count": get("sold_count"), "first_comment": get("first_comment"),
+            "short_description": get("short_description"),
+            "product_url": url, "image_url": get("image_url")
+        }
+
+    def extract(self, page, url):
+        with METRICS.timer("extract", url):
+            ctx = PageContext(page)
+            return self._row(lambda field: self.field(page, field, ctx, url), url)
+
+    def extract_raw(self, raw, url):
+        """Row tu ket qua extract_product.js: cung thu tu strategy, hau xu ly va stats voi extract()"""
+        with METRICS.timer("extract", url):
+            return self._row(lambda field: self.field_from(raw, field, url), url)
+
+    def js_rules(self):
+        return js_rules(self.spec)
+
+
+ENGINE = RuleEngine()
+
+
+def main():
+    from archive import HtmlArchive
+    import os
+
+    pages = []
+    for path in sys.argv[1:]:
+        if os.path.isdir(path):
+            archive = HtmlArchive(path)
+            pages += [(url, lambda a=archive, s=sha, u=final_url: HtmlPage(a.get(s), base_url=u))
+                      for url, final_url, sha in archive.latest()]
+        else:
+            pages.append((path, lambda p=path: HtmlPage.from_file(p)))
+    if not pages:
+        print("Dung: python scripts/rules.py html_archive | file.html [...]")
+        return
+
+    start = time.time()
+    for url, load in pages:
+        ENGINE.extract(load(), url)
+    print(f"{len(pages)} trang, {time.time() - start:.2f}s\n")
+    print(ENGINE.stats.report())
+    dead = ENGINE.stats.dead()
+    if dead: print(f"\n{len(dead)} strategy chua trung lan nao: {', '.join(f'{f}/{n}' for f, n in dead)}")
+
+
+if __name__ == "__main__":
+    main()
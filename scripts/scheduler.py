@@ -0,0 +1,166 @@
+# coding: utf-8
+"""
+Lich cao lai theo do uu tien: san pham "nong" duoc lam moi thuong xuyen hon.
+
+Moi san pham co 1 chu ky lam moi (gio) tinh tu du lieu trong crawl_state.db (state_store.py):
+    toc do ban      sold_count tang bao nhieu / ngay (bang history); chua co lich su thi
+                    dung sold_count tich luy / 365 ngay
+    bien dong gia   ty le so lan gia doi giua cac lan du lieu thay doi
+    doanh thu       giong truyvan.py: nhom gay 80% doanh thu (ADV6), top 10 doanh thu (ADV2);
+                    doanh thu = gia thap nhat * sold_count (moi loai san pham, khong chi can 4m5)
+    on dinh         lau khong doi -> chu ky dai ra (toi da x2)
+
+Uu tien = thoi gian tu lan fetch cuoi / chu ky (>= 1 la den han), san pham chua tung cao dung dau.
+Moi lan crawl lay theo thu tu uu tien den khi het ngan sach:
+    python scripts/crawl.py --schedule --budget-requests 200
+    python scripts/crawl.py --mode async --schedule --budget-minutes 10
+    python scripts/scheduler.py --top 30          # xem lich, khong cao
+"""
+
+import argparse
+import json
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from state_store import STATE_DB, StateStore
+
+BASE_HOURS = 7 * 24
+MIN_HOURS = 6
+MAX_HOURS = 30 * 24
+STABLE_DAYS = 60  # khong doi STABLE_DAYS ngay -> chu ky x2
+VELOCITY_WEIGHT = 3.0
+VOLATILITY_WEIGHT = 2.0
+CORE_WEIGHT = 1.0  # ADV6
+TOP_WEIGHT = 1.0  # ADV2
+TOP_N = 10
+CORE_SHARE = 0.8
+
+
+def _number(text):
+    digits = re.sub(r"[^\d]", "", str(text or ""))
+    return int(digits) if digits else None
+
+
+def min_price(price):
+    """'1720000 | 2040000' -> 1720000"""
+    prices = [p for p in (_number(part) for part in str(price or "").split("|")) if p]
+    return min(prices) if prices else None
+
+
+def _time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _hours(delta):
+    return delta.total_seconds() / 3600
+
+
+def _rank(values):
+    """url -> phan vi 0..1 (gia tri lon nhat = 1)"""
+    order = sorted(values, key=values.get)
+    n = max(1, len(order) - 1)
+    return {url: i / n for i, url in enumerate(order)}
+
+
+# ===== DU LIEU =====
+def load_products(state):
+    """url -> {sold, price, fetched_at, changed_at, history: [(time, sold, price)]}"""
+    history = defaultdict(list)
+    for url, fetched_at, sold, price in state.conn.execute(
+            "SELECT url, fetched_at, sold_count, price FROM history ORDER BY fetched_at"):
+        history[url].append((_time(fetched_at), _number(sold), min_price(price)))
+    products = {}
+    for rec in state.conn.execute("SELECT url, row_json, fetched_at, changed_at FROM pages"):
+        if not rec["row_json"]: continue
+        row = json.loads(rec["row_json"])
+        products[rec["url"]] = {"sold": _number(row.get("sold_count")) or 0, "price": min_price(row.get("price")),
+                                "fetched_at": _time(rec["fetched_at"]), "changed_at": _time(rec["changed_at"]),
+                                "history": history.get(rec["url"], [])}
+    return products
+
+
+def velocity(p):
+    """sold_count tang / ngay"""
+    points = [(t, sold) for t, sold, _ in p["history"] if sold is not None]
+    if len(points) >= 2:
+        days = max(1.0, _hours(p["fetched_at"] - points[0][0]) / 24)
+        return max(0, points[-1][1] - points[0][1]) / days
+    return p["sold"] / 365
+
+
+def volatility(p):
+    prices = [price for _, _, price in p["history"] if price]
+    if len(prices) < 2: return 0.0
+    return sum(1 for a, b in zip(prices, prices[1:]) if a != b) / (len(prices) - 1)
+
+
+def revenue_groups(products):
+    """(core, top): nhom gay CORE_SHARE doanh thu (ADV6) va TOP_N doanh thu cao nhat (ADV2)"""
+    revenue = {url: p["price"] * p["sold"] for url, p in products.items() if p["price"] and p["sold"]}
+    ranked = sorted(revenue, key=revenue.get, reverse=True)
+    total = sum(revenue.values())
+    core, cum = set(), 0
+    for url in ranked:
+        cum += revenue[url]
+        if cum / total > CORE_SHARE: break
+        core.add(url)
+    return core, set(ranked[:TOP_N])
+
+
+# ===== LICH =====
+def score(products, now=None):
+    """url -> {heat, interval_h, priority, velocity, volatility, core, top}"""
+    now = now or datetime.now(timezone.utc)
+    velocities = {url: velocity(p) for url, p in products.items()}
+    vel_rank = _rank(velocities)
+    core, top = revenue_groups(products)
+    scores = {}
+    for url, p in products.items():
+        vol = volatility(p)
+        heat = (1 + VELOCITY_WEIGHT * vel_rank[url] + VOLATILITY_WEIGHT * vol
+                + CORE_WEIGHT * (url in core) + TOP_WEIGHT * (url in top))
+        stable_days = _hours(now - (p["changed_at"] or p["fetched_at"])) / 24
+        interval = BASE_HOURS / heat * (1 + min(1.0, stable_days / STABLE_DAYS))
+        interval = min(MAX_HOURS, max(MIN_HOURS, interval))
+        scores[url] = {"heat": heat, "interval_h": interval, "priority": _hours(now - p["fetched_at"]) / interval,
+                       "velocity": velocities[url], "volatility": vol, "core": url in core, "top": url in top}
+    return scores
+
+
+def plan(urls, state, budget=None, now=None):
+    """
+    Sap xep urls theo uu tien (chua tung cao -> den han nhieu nhat -> heat cao), cat theo budget (so request).
+    Tra ve (urls can cao, urls de lai, scores).
+    """
+    scores = score(load_products(state), now)
+    new = {"priority": float("inf"), "heat": 0}
+    ordered = sorted(urls, key=lambda url: (scores.get(url, new)["priority"], scores.get(url, new)["heat"]),
+                     reverse=True)
+    if budget is None: return ordered, [], scores
+    return ordered[:budget], ordered[budget:], scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xem lich cao lai theo do uu tien")
+    parser.add_argument("--state-db", default=STATE_DB)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    state = StateStore(args.state_db)
+    try:
+        products = load_products(state)
+        scores = score(products)
+    finally:
+        state.close()
+    due = sum(1 for s in scores.values() if s["priority"] >= 1)
+    print(f"{len(scores)} san pham, den han: {due}\n")
+    print(f"{'uu tien':>8} {'chu ky h':>9} {'heat':>5} {'ban/ngay':>9} {'bien dong':>9}  nhom  url")
+    for url, s in sorted(scores.items(), key=lambda kv: (kv[1]["priority"], kv[1]["heat"]), reverse=True)[:args.top]:
+        group = ("C" if s["core"] else "-") + ("T" if s["top"] else "-")
+        print(f"{s['priority']:>8.2f} {s['interval_h']:>9.1f} {s['heat']:>5.2f} {s['velocity']:>9.2f} "
+              f"{s['volatility']:>9.2f}  {group:<4}  {url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# coding: utf-8
+"""
+Ghi row theo tung lo (batch) ngay khi cao xong, thay vi gom het vao 1 DataFrame.
+
+    sink = open_sink("vuadocau.jsonl")   # hoac .csv / .parquet
+    sink.write(row)                      # moi BATCH_SIZE row -> ghi xuong file
+    sink.close()
+    to_xlsx("vuadocau.jsonl", "vuadocau.xlsx")   # tuy chon, cung stream tung dong
+
+Bo nho chi giu 1 batch, khong phu thuoc so san pham.
+"""
+
+import csv
+import json
+import os
+
+from extractors import COLUMNS, clean_excel
+
+BATCH_SIZE = 200
+# Giong final-craw.py: cac cot nay luu dang chuoi, None -> ""
+STR_COLUMNS = ["rating_score", "count_rate", "sold_count", "first_comment"]
+
+
+def clean_batch(rows, columns=COLUMNS):
+    """Lam sach ky tu cam Excel + chuan hoa cot chuoi, cho tung batch"""
+    out = []
+    for row in rows:
+        row = {col: clean_excel(row.get(col)) for col in columns}
+        for col in STR_COLUMNS:
+            row[col] = "" if row[col] is None else str(row[col])
+        out.append(row)
+    return out
+
+
+class RowSink:
+    def __init__(self, path, batch_size=BATCH_SIZE, columns=COLUMNS):
+        self.path = path
+        self.batch_size = batch_size
+        self.columns = columns
+        self.batch = []
+        self.count = 0
+        self.filled = {col: 0 for col in columns}  # so row co gia tri, de in thong ke
+
+    def write(self, row):
+        self.batch.append(row)
+        self.count += 1
+        for col in self.columns:
+            if row.get(col) not in (None, ""): self.filled[col] += 1
+        if len(self.batch) >= self.batch_size: self.flush()
+
+    def flush(self):
+        if self.batch:
+            self._write_batch(clean_batch(self.batch, self.columns))
+            self.batch = []
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def _write_batch(self, rows):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class JsonlSink(RowSink):
+    def __init__(self, path, batch_size=BATCH_SIZE, append=False, columns=COLUMNS):
+        super().__init__(path, batch_size, columns)
+        self.f = open(path, "a" if append else "w", encoding="utf-8")
+
+    def _write_batch(self, rows):
+        self.f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self.f.flush()
+
+    def _close(self):
+        self.f.close()
+
+
+class CsvSink(RowSink):
+    def __init__(self, path, batch_size=BATCH_SIZE, append=False, columns=COLUMNS):
+        super().__init__(path, batch_size, columns)
+        new_file = not (append and os.path.exists(path))
+        self.f = open(path, "a" if append else "w", encoding="utf-8-sig", newline="")
+        self.writer = csv.DictWriter(self.f, fieldnames=columns)
+        if new_file: self.writer.writeheader()
+
+    def _write_batch(self, rows):
+        self.writer.writerows(rows)
+        self.f.flush()
+
+    def _close(self):
+        self.f.close()
+
+
+class ParquetSink(RowSink):
+    """Moi batch la 1 row group (can pyarrow)"""
+
+    def __init__(self, path, batch_size=BATCH_SIZE, append=False, columns=COLUMNS):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        super().__init__(path, batch_size, columns)
+        if append: raise ValueError("Parquet khong ho tro ghi tiep, dung .jsonl / .csv")
+        self.pa = pa
+        self.schema = pa.schema([(col, pa.string()) for col in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def _write_batch(self, rows):
+        data = {col: [None if r[col] is None else str(r[col]) for r in rows] for col in self.columns}
+        self.writer.write_table(self.pa.table(data, schema=self.schema))
+
+    def _close(self):
+        self.writer.close()
+
+
+SINKS = {".jsonl": JsonlSink, ".csv": CsvSink, ".parquet": ParquetSink}
+
+
+def open_sink(path, batch_size=BATCH_SIZE, append=False, columns=COLUMNS):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SINKS:
+        raise ValueError(f"Khong ho tro dinh dang {ext} (chi {', '.join(SINKS)})")
+    return SINKS[ext](path, batch_size, append=append, columns=columns)
+
+
+def iter_rows(path):
+    """Doc lai file sink tung row (khong load het)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip(): yield json.loads(line)
+    elif ext == ".csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            yield from csv.DictReader(f)
+    elif ext == ".parquet":
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        for i in range(pf.num_row_groups):
+            yield from pf.read_row_group(i).to_pylist()
+    else:
+        raise ValueError(f"Khong ho tro dinh dang {ext}")
+
+
+def to_xlsx(src, output_file, columns=COLUMNS):
+    """Chuyen file sink sang xlsx bang openpyxl write_only (stream tung dong)"""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    n = 0
+    for row in iter_rows(src):
+        ws.append([clean_excel(row.get(col)) for col in columns])
+        n += 1
+    wb.save(output_file)
+    return n
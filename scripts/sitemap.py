@@ -0,0 +1,126 @@
+# coding: utf-8
+"""
+Tim san pham qua sitemap XML thay vi render cac trang listing.
+
+Sitemap duoc doc kieu stream (iterparse), khong load ca file vao RAM.
+Moi URL + lastmod duoc luu vao frontier (SQLite). Lan crawl sau chi lay
+cac san pham co lastmod moi hon lan fetch thanh cong gan nhat.
+"""
+
+import sqlite3
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from canonical import canonical_url
+from http_fetch import TIMEOUT, make_session
+from state_store import now_utc
+
+SITEMAP_URLS = ["sitemap_index.xml", "wp-sitemap.xml", "sitemap.xml"]
+FRONTIER_DB = "frontier.db"
+NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+def normalize_lastmod(value):
+    """'2025-12-20T08:15:00+07:00' -> '2025-12-20T01:15:00+00:00' (UTC, so sanh chuoi duoc)"""
+    if not value: return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None: dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def _iter_entries(session, url):
+    """Stream 1 file sitemap, yield (kind, loc, lastmod) voi kind = 'sitemap' hoac 'url'"""
+    with session.get(url, stream=True, timeout=TIMEOUT) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        for _, el in ET.iterparse(resp.raw, events=("end",)):
+            if el.tag not in (NS + "url", NS + "sitemap"): continue
+            loc = el.findtext(NS + "loc")
+            lastmod = el.findtext(NS + "lastmod")
+            yield ("sitemap" if el.tag == NS + "sitemap" else "url"), (loc or "").strip(), lastmod
+            el.clear()
+
+
+def iter_product_urls(base_url, session=None, sitemap_url=None):
+    """
+    Yield (product_url, lastmod), URL da chuan hoa. Neu la sitemap index thi chi vao cac
+    sitemap con co chu 'product' trong ten.
+    """
+    session = session or make_session()
+    parts = urlsplit(base_url)
+    root = f"{parts.scheme}://{parts.netloc}/"
+    candidates = [sitemap_url] if sitemap_url else [root + name for name in SITEMAP_URLS]
+
+    for url in candidates:
+        try:
+            stack = [url]
+            while stack:
+                current = stack.pop()
+                for kind, loc, lastmod in _iter_entries(session, current):
+                    if kind == "sitemap":
+                        if "product" in loc.lower(): stack.append(loc)
+                    elif "/san-pham/" in loc or "/product/" in loc or "product" in current.lower():
+                        yield canonical_url(loc), normalize_lastmod(lastmod)
+            return
+        except Exception as e:
+            print(f"  Khong doc duoc {url}: {e}")
+    raise RuntimeError("Khong tim thay sitemap san pham")
+
+
+# ===== FRONTIER =====
+class Frontier:
+    def __init__(self, path=FRONTIER_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                lastmod TEXT,
+                discovered_at TEXT,
+                last_fetched TEXT
+            )""")
+        self.conn.commit()
+
+    def add_many(self, entries):
+        """entries: iterable (url, lastmod). Tra ve so URL moi."""
+        before = self.count()
+        now = now_utc()
+        self.conn.executemany("""
+            INSERT INTO frontier (url, lastmod, discovered_at) VALUES (?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET lastmod = excluded.lastmod
+            """, ((url, lastmod, now) for url, lastmod in entries))
+        self.conn.commit()
+        return self.count() - before
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+    def all_urls(self):
+        return [r[0] for r in self.conn.execute("SELECT url FROM frontier ORDER BY url")]
+
+    def due_urls(self):
+        """URL chua fetch bao gio, hoac lastmod moi hon lan fetch cuoi (lastmod rong -> luon fetch)"""
+        return [r[0] for r in self.conn.execute("""
+            SELECT url FROM frontier
+            WHERE last_fetched IS NULL OR lastmod IS NULL OR lastmod > last_fetched
+            ORDER BY url""")]
+
+    def mark_fetched(self, urls, when=None):
+        when = when or now_utc()
+        self.conn.executemany("UPDATE frontier SET last_fetched = ? WHERE url = ?",
+                              ((when, url) for url in urls))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def discover_from_sitemap(base_url, frontier, changed_only=False, sitemap_url=None):
+    """Cap nhat frontier tu sitemap, tra ve danh sach URL can cao"""
+    added = frontier.add_many(iter_product_urls(base_url, sitemap_url=sitemap_url))
+    urls = frontier.due_urls() if changed_only else frontier.all_urls()
+    print(f"  Sitemap: {frontier.count()} san pham ({added} moi), can cao: {len(urls)}")
+    return urls
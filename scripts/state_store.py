@@ -0,0 +1,124 @@
+# coding: utf-8
+"""
+Luu trang thai tung product_url giua cac lan crawl (SQLite):
+ETag / Last-Modified, hash cua HTML, hash cua cac truong da trich xuat,
+row lan truoc va thoi gian fetch.
+
+Crawler gui If-None-Match / If-Modified-Since. Server tra 304, hoac HTML
+khong doi (cung hash) -> bo qua trich xuat, dung lai row cu.
+
+Bang history giu sold_count / price moi lan du lieu thay doi (scheduler.py tinh
+toc do ban, do bien dong gia).
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+
+STATE_DB = "crawl_state.db"
+
+
+def now_utc():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def row_hash(row):
+    data = {k: v for k, v in row.items() if k != "product_url"}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def body_hash(body):
+    return hashlib.sha1(body).hexdigest()
+
+
+class StateStore:
+    def __init__(self, path=STATE_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                content_hash TEXT,
+                row_json TEXT,
+                fetched_at TEXT,
+                changed_at TEXT
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                url TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                sold_count TEXT,
+                price TEXT
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_history_url ON history (url)")
+        self.conn.commit()
+        self.stats = {"not_modified": 0, "same_body": 0, "unchanged": 0, "changed": 0}
+
+    def get(self, url):
+        return self.conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+
+    def conditional_headers(self, url):
+        rec = self.get(url)
+        if rec is None or rec["row_json"] is None: return {}
+        headers = {}
+        if rec["etag"]: headers["If-None-Match"] = rec["etag"]
+        if rec["last_modified"]: headers["If-Modified-Since"] = rec["last_modified"]
+        return headers
+
+    def is_same_body(self, url, body):
+        rec = self.get(url)
+        return rec is not None and rec["row_json"] is not None and rec["body_hash"] == body_hash(body)
+
+    def carry_forward(self, url, reason="not_modified", etag=None, last_modified=None):
+        """Trang khong doi: cap nhat fetched_at, tra ve row cu"""
+        rec = self.get(url)
+        if rec is None or rec["row_json"] is None: return None
+        self.conn.execute("""
+            UPDATE pages SET fetched_at = ?, etag = COALESCE(?, etag),
+                             last_modified = COALESCE(?, last_modified)
+            WHERE url = ?""", (now_utc(), etag, last_modified, url))
+        self.conn.commit()
+        self.stats[reason] += 1
+        return json.loads(rec["row_json"])
+
+    def save(self, url, row, body=None, etag=None, last_modified=None):
+        """Luu row moi. Tra ve True neu du lieu khac lan truoc."""
+        rec = self.get(url)
+        h = row_hash(row)
+        changed = rec is None or rec["content_hash"] != h
+        now = now_utc()
+        self.conn.execute("""
+            INSERT INTO pages (url, etag, last_modified, body_hash, content_hash, row_json, fetched_at, changed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag, last_modified = excluded.last_modified,
+                body_hash = excluded.body_hash, content_hash = excluded.content_hash,
+                row_json = excluded.row_json, fetched_at = excluded.fetched_at,
+                changed_at = CASE WHEN pages.content_hash = excluded.content_hash
+                                  THEN pages.changed_at ELSE excluded.changed_at END
+            """, (url, etag, last_modified, body_hash(body) if body is not None else None, h,
+                  json.dumps(row, ensure_ascii=False), now, now))
+        if changed:
+            self.conn.execute("INSERT INTO history VALUES (?, ?, ?, ?)",
+                              (url, now, row.get("sold_count"), row.get("price")))
+        self.conn.commit()
+        self.stats["changed" if changed else "unchanged"] += 1
+        return changed
+
+    def rows_for(self, urls):
+        """Row cu cua cac URL khong cao lan nay (giu nguyen trong snapshot)"""
+        wanted = set(urls)
+        return [json.loads(r["row_json"]) for r in self.conn.execute("SELECT url, row_json FROM pages")
+                if r["url"] in wanted and r["row_json"]]
+
+    def summary(self):
+        s = self.stats
+        return (f"304: {s['not_modified']}, HTML khong doi: {s['same_body']}, "
+                f"du lieu khong doi: {s['unchanged']}, thay doi/moi: {s['changed']}")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,218 @@
+# coding: utf-8
+"""
+Lay du lieu qua WooCommerce Store API (JSON) thay vi render tung trang HTML.
+
+    GET {site}/wp-json/wc/store/v1/products?per_page=100&page=N
+
+Moi trang tra ve toi da 100 san pham, tong so trang nam trong header
+X-WP-TotalPages. JSON duoc map sang dung cac cot cua final-craw.py.
+API khong co sold_count / first_comment, va khong co mau khi san pham khong co thuoc tinh mau
+(mau lay tu swatch / mo ta / ma GP-XXX trong trang), nen cac truong nay lay bo sung tu HTML
+(fill_from_html), tai song song qua aiohttp.
+"""
+
+import argparse
+import asyncio
+import html
+import json
+import os
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import aiohttp
+
+from async_crawl import CONCURRENCY, RATE, HostRateLimiter, fetch_page as fetch_page_async
+from extractors import COLUMNS, get_color_group, get_first_comment, get_size_price_raw, get_sold_count, strip_html
+from http_fetch import HEADERS, TIMEOUT, fetch_page, make_session
+from retry import classify
+
+PER_PAGE = 100
+API_PATH = "/wp-json/wc/store/v1/products"
+SIZE_KEYS = ["size", "kich", "chieu", "dai", "length"]
+COLOR_KEYS = ["color", "mau", "colour", "nhom", "group"]
+
+
+def api_url(base_url):
+    """https://vuadocau.com/shop/ -> https://vuadocau.com/wp-json/wc/store/v1/products"""
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}{API_PATH}"
+
+
+def _price(prices, key="price", minor_unit=None):
+    """
+    Store API tra gia dang so nguyen theo don vi nho nhat (currency_minor_unit).
+    minor_unit: lay tu prices cha khi doc prices.price_range (price_range khong co truong nay).
+    """
+    raw = (prices or {}).get(key)
+    if raw in (None, ""): return None
+    if minor_unit is None: minor_unit = prices.get("currency_minor_unit", 0)
+    val = int(raw) / (10 ** int(minor_unit))
+    return str(int(val)) if val == int(val) else str(val)
+
+
+def _attr_terms(product, keys):
+    for attr in product.get("attributes", []):
+        name = (attr.get("taxonomy") or attr.get("name") or "").lower()
+        if any(k in name for k in keys):
+            return [t.get("name") for t in attr.get("terms", []) if t.get("name")]
+    return []
+
+
+def map_product(product):
+    """1 object JSON cua Store API -> row dict giong final-craw.py"""
+    sizes = _attr_terms(product, SIZE_KEYS)
+    colors = _attr_terms(product, COLOR_KEYS)
+    prices = product.get("prices", {})
+    price_range = prices.get("price_range") or {}
+
+    if sizes and price_range:
+        # Gia tung bien the khong co trong listing -> lay khoang gia min/max
+        unit = prices.get("currency_minor_unit", 0)
+        lo, hi = _price(price_range, "min_amount", unit), _price(price_range, "max_amount", unit)
+        price = lo if lo == hi else f"{lo} - {hi}"
+    else:
+        price = _price(prices)
+
+    images = product.get("images") or []
+    review_count = product.get("review_count")
+    rating = product.get("average_rating")
+    return {
+        "name": html.unescape(product.get("name") or "") or None,
+        "size": " | ".join(sizes) or None,
+        "price": price,
+        "color": " | ".join(dict.fromkeys(colors)) or None,
+        "rating_score": rating if rating and float(rating) > 0 else None,
+        "count_rate": str(review_count) if review_count else None,
+        "sold_count": None,
+        "first_comment": None,
+        "short_description": strip_html(product.get("short_description")),
+        "product_url": product.get("permalink"),
+        "image_url": images[0].get("src") if images else None,
+    }
+
+
+def iter_products(base_url, session=None, per_page=PER_PAGE, delay=0.5):
+    """Duyet tung trang JSON, yield tung product (dict goc cua API)"""
+    session = session or make_session()
+    url, page, total_pages = api_url(base_url), 1, None
+    while total_pages is None or page <= total_pages:
+        resp = session.get(url, params={"per_page": per_page, "page": page}, timeout=TIMEOUT)
+        resp.raise_for_status()
+        if total_pages is None:
+            total_pages = int(resp.headers.get("X-WP-TotalPages", 1))
+            print(f"  Store API: {resp.headers.get('X-WP-Total', '?')} san pham, {total_pages} trang")
+        batch = resp.json()
+        if not batch: break
+        yield from batch
+        page += 1
+        if delay: time.sleep(delay)
+
+
+def fill_from_html(row, session, variable=False):
+    """Tai trang HTML (requests) roi apply_html"""
+    return apply_html(row, fetch_page(session, row["product_url"]), variable)
+
+
+def apply_html(row, page, variable=False):
+    """
+    Bo sung cac truong API khong co (sold_count, first_comment, mau neu API khong co) tu trang HTML.
+    San pham co bien the: lay gia tung size tu data-product_variations thay cho khoang gia.
+    """
+    row["sold_count"] = get_sold_count(page)
+    row["first_comment"] = get_first_comment(page)
+    if row["color"] is None: row["color"] = get_color_group(page)
+    if variable:
+        size, price = get_size_price_raw(page)
+        if price: row["size"], row["price"] = size, price
+    return row
+
+
+async def _fill_all(items, concurrency, rate):
+    """items: [(row, variable)]. Tai trang HTML song song, gioi han rate theo host. Tra ve errors."""
+    limiter, sem = HostRateLimiter(rate), asyncio.Semaphore(concurrency)
+
+    async def fill(session, row, variable):
+        async with sem:
+            apply_html(row, await fetch_page_async(session, limiter, row["product_url"]), variable)
+
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout) as session:
+        results = await asyncio.gather(*(fill(session, row, variable) for row, variable in items),
+                                       return_exceptions=True)
+    return [{"url": row["product_url"], "error": f"html fallback: {res}", "kind": classify(res)}
+            for (row, _), res in zip(items, results) if isinstance(res, Exception)]
+
+
+def crawl_store_api(base_url, html_fallback=True, on_done=None, concurrency=CONCURRENCY, rate=RATE):
+    """Tra ve (rows, errors) voi cung cot COLUMNS"""
+    session = make_session()
+    items = [(map_product(product), product.get("type") == "variable") for product in iter_products(base_url, session)]
+    errors = []
+    if html_fallback:
+        todo = [(row, variable) for row, variable in items if row["product_url"]]
+        print(f"  Bo sung sold_count / first_comment tu HTML: {len(todo)} trang (song song {concurrency})")
+        errors = asyncio.run(_fill_all(todo, concurrency, rate))
+    rows = []
+    for row, _ in items:
+        rows.append({col: row.get(col) for col in COLUMNS})
+        if on_done: on_done(row["product_url"])
+    return rows, errors
+
+
+# ===== STUB LOCAL (test khong can mang) =====
+def record(base_url, out_dir, per_page=PER_PAGE):
+    """Luu tung trang JSON cua API vao out_dir/page_N.json"""
+    os.makedirs(out_dir, exist_ok=True)
+    session = make_session()
+    page, total_pages = 1, 1
+    while page <= total_pages:
+        resp = session.get(api_url(base_url), params={"per_page": per_page, "page": page}, timeout=TIMEOUT)
+        resp.raise_for_status()
+        total_pages = int(resp.headers.get("X-WP-TotalPages", 1))
+        with open(os.path.join(out_dir, f"page_{page}.json"), "w", encoding="utf-8") as f:
+            json.dump(resp.json(), f, ensure_ascii=False)
+        page += 1
+    print(f"Da luu {total_pages} trang vao {out_dir}")
+
+
+def serve(out_dir, port=8000):
+    """Phuc vu cac trang da record tai http://localhost:PORT/wp-json/wc/store/v1/products"""
+    total_pages = len([f for f in os.listdir(out_dir) if re.match(r"page_\d+\.json$", f)])
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            page = int(parse_qs(parts.query).get("page", ["1"])[0])
+            path = os.path.join(out_dir, f"page_{page}.json")
+            if parts.path.rstrip("/") != API_PATH or not os.path.exists(path):
+                self.send_error(404)
+                return
+            with open(path, "rb") as f: body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("X-WP-TotalPages", str(total_pages))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    print(f"Stub Store API: http://localhost:{port}{API_PATH} ({total_pages} trang)")
+    ThreadingHTTPServer(("", port), Handler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record / stub WooCommerce Store API")
+    parser.add_argument("action", choices=["record", "serve"])
+    parser.add_argument("dir")
+    parser.add_argument("--base-url", default="https://vuadocau.com/shop/")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    if args.action == "record":
+        record(args.base_url, args.dir)
+    else:
+        serve(args.dir, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# coding: utf-8
+"""
+Crawler vuadocau.com dang package import duoc (chay voi thu muc scripts/ trong sys.path).
+
+Package chi la lop API mong: cac module van o dang phang trong scripts/ vi moi script deu chay
+truc tiep (python scripts/crawl.py ...) va import nhau theo ten phang (from extractors import ...).
+
+Import khong mo Chrome, khong import pandas / selenium webdriver / aiohttp:
+    import vuadocau
+    page = vuadocau.HtmlPage.from_file("bench/pages/variable_swatch.html")
+    row = vuadocau.extract_product(page, "https://vuadocau.com/...")
+    rows, errors, stats = vuadocau.crawl_urls(urls, mode="async", limit=20)   # Chrome mo khi co trang can JS
+
+CLI (giong scripts/crawl.py):
+    python -m vuadocau --mode selenium --limit 10 --workers 4
+"""
+
+from extractors import COLUMNS, HtmlPage, clean_excel, extract_product, snapshot
+
+
+def crawl_urls(urls, mode="http", limit=None, workers=None, extractor="snapshot"):
+    """Xem crawl.crawl_urls: tra ve (rows, errors, stats)"""
+    from crawl import crawl_urls
+    return crawl_urls(urls, mode, limit, workers, extractor)
+
+
+def main(argv=None):
+    from crawl import main
+    return main(argv)
@@ -0,0 +1,88 @@
+# coding: utf-8
+"""
+Cho trang san sang theo dieu kien thay cho time.sleep co dinh.
+
+Trang san pham: cho dung cac selector ma extractor can (h1, p.price,
+form.variations_form), moi selector co timeout rieng. Khong selector nao
+xuat hien thi fallback ve WebDriverWait(WAIT) cho document.readyState.
+Thoi gian cho thuc te cua tung trang duoc ghi lai (WaitLog).
+"""
+
+import csv
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from metrics import METRICS
+
+WAIT = 15
+POLL = 0.1
+
+# (selector, timeout giay) - theo thu tu extractor can
+PRODUCT_READY = [
+    ("h1", 10),
+    ("p.price, form.variations_form", 5),
+]
+
+
+def _document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def wait_ready(driver, selectors=PRODUCT_READY, fallback=WAIT):
+    """Cho cac selector xuat hien. Tra ve so giay da cho thuc te."""
+    start = time.perf_counter()
+    found = False
+    for sel, timeout in selectors:
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=POLL).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, sel)))
+            found = True
+        except:
+            continue
+    if not found:
+        try:
+            WebDriverWait(driver, fallback, poll_frequency=POLL).until(_document_ready)
+        except:
+            pass
+    return time.perf_counter() - start
+
+
+def get_ready(driver, url, log=None, selectors=PRODUCT_READY):
+    """driver.get + cho san sang, ghi thoi gian cho vao log"""
+    with METRICS.timer("navigation", url):
+        driver.get(url)
+    elapsed = wait_ready(driver, selectors)
+    if log is not None: log.add(url, elapsed)
+    METRICS.observe("wait", elapsed, url)
+    return elapsed
+
+
+class WaitLog:
+    """Ghi thoi gian cho cua tung trang de xem phan phoi do tre"""
+
+    def __init__(self):
+        self.records = []
+
+    def add(self, url, seconds):
+        self.records.append((url, seconds))
+
+    def percentile(self, p):
+        values = sorted(s for _, s in self.records)
+        if not values: return 0.0
+        return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+    def summary(self):
+        if not self.records: return "Thoi gian cho: (chua co trang nao)"
+        total = sum(s for _, s in self.records)
+        return (f"Thoi gian cho ({len(self.records)} trang): tong {total:.1f}s, "
+                f"p50 {self.percentile(50):.2f}s, p95 {self.percentile(95):.2f}s, "
+                f"max {self.percentile(100):.2f}s")
+
+    def to_csv(self, path):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["url", "wait_seconds"])
+            for url, s in self.records: writer.writerow([url, f"{s:.3f}"])
@@ -0,0 +1,324 @@
+# coding: utf-8
+"""
+Hang doi cong viec dung chung (SQLite, WAL) de nhieu tien trinh / nhieu may cung cao 1 catalog.
+
+Moi URL 1 dong trong bang jobs: pending -> leased (co lease_owner + lease_expires) -> done / failed.
+Worker claim 1 batch, heartbeat gia han lease trong luc cao, ghi row vao chinh file queue.
+Lease het han (worker chet / treo) -> URL tu ve pending o lan claim sau. Row chi duoc ghi khi
+worker con giu lease (lease_owner khop) nen 1 URL khong bao gio co 2 row.
+
+    python scripts/work_queue.py enqueue                       # BUOC 1 (listing) -> queue
+    python scripts/work_queue.py enqueue --from links.txt       # hoac danh sach URL co san
+    python scripts/work_queue.py work --batch 20 -- --mode async --concurrency 16   # chay N lan, N may
+    python scripts/work_queue.py stats
+    python scripts/work_queue.py export --output vuadocau.jsonl --xlsx vuadocau.xlsx
+
+Nhieu may: dat file queue tren o chia se co file lock va chay voi --no-wal (WAL can
+shared memory nen chi dung duoc khi moi tien trinh cung 1 may). Dong ho cac may can dong bo (NTP).
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from retry import MAX_ATTEMPTS, TRANSIENT, backoff_delay
+from state_store import now_utc
+
+QUEUE_DB = "crawl_queue.db"
+LEASE_SECONDS = 300.0
+BATCH = 20
+POLL = 5.0  # giay, doi khi moi URL con lai dang bi worker khac giu
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    def __init__(self, path=QUEUE_DB, owner=None, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, wal=True):
+        self.path = path
+        self.owner = owner or worker_name()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.wal = wal
+        # isolation_level=None: tu quan ly transaction (BEGIN IMMEDIATE khi claim)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                lease_owner TEXT,
+                lease_expires REAL,
+                available_at REAL NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                row_json TEXT,
+                error TEXT,
+                enqueued_at TEXT,
+                updated_at TEXT
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, available_at)")
+
+    def _tx(self, fn):
+        """Chay fn(conn) trong 1 transaction ghi (khoa ngay tu dau, tranh 2 worker claim cung URL)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(self.conn)
+        except:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return result
+
+    def enqueue(self, urls, requeue=False):
+        """Them URL moi (pending). requeue=True: dua ca URL da done / failed ve pending. Tra ve so URL them."""
+        now = now_utc()
+
+        def run(conn):
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO jobs (url, enqueued_at, updated_at) VALUES (?, ?, ?)",
+                             ((url, now, now) for url in urls))
+            added = conn.total_changes - before
+            if requeue:
+                conn.executemany("""
+                    UPDATE jobs SET status = 'pending', attempts = 0, available_at = 0, error = NULL, updated_at = ?
+                    WHERE url = ? AND status IN ('done', 'failed')""", ((now, url) for url in urls))
+            return added
+        return self._tx(run)
+
+    def _expire(self, conn, now):
+        """Lease het han -> pending (hoac failed neu URL da lam chet worker qua max_attempts lan)"""
+        conn.execute("""
+            UPDATE jobs SET status = 'failed', lease_owner = NULL, error = 'lease het han ' || attempts || ' lan',
+                            updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""", (now_utc(), now, self.max_attempts))
+        conn.execute("""
+            UPDATE jobs SET status = 'pending', lease_owner = NULL, updated_at = ?
+            WHERE status = 'leased' AND lease_expires < ?""", (now_utc(), now))
+
+    def claim(self, n=BATCH):
+        """Lay toi da n URL dang pending, giu lease lease_seconds giay"""
+        def run(conn):
+            now = time.time()
+            self._expire(conn, now)
+            urls = [r[0] for r in conn.execute("""
+                SELECT url FROM jobs WHERE status = 'pending' AND available_at <= ?
+                ORDER BY rowid LIMIT ?""", (now, n))]
+            conn.executemany("""
+                UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1,
+                                updated_at = ?
+                WHERE url = ?""", ((self.owner, now + self.lease_seconds, now_utc(), url) for url in urls))
+            return urls
+        return self._tx(run)
+
+    def heartbeat(self, urls):
+        """Gia han lease cac URL minh dang giu. Tra ve so URL con giu duoc."""
+        def run(conn):
+            before = conn.total_changes
+            conn.executemany("""
+                UPDATE jobs SET lease_expires = ? WHERE url = ? AND status = 'leased' AND lease_owner = ?""",
+                             ((time.time() + self.lease_seconds, url, self.owner) for url in urls))
+            return conn.total_changes - before
+        return self._tx(run)
+
+    def complete(self, url, row):
+        """Ghi row. False neu lease da bi worker khac lay (row bi bo, khong ghi trung)."""
+        cur = self.conn.execute("""
+            UPDATE jobs SET status = 'done', row_json = ?, error = NULL, lease_owner = NULL, updated_at = ?
+            WHERE url = ? AND status = 'leased' AND lease_owner = ?""",
+                                (json.dumps(row, ensure_ascii=False), now_utc(), url, self.owner))
+        return cur.rowcount == 1
+
+    def fail(self, url, error, transient=False):
+        """Loi transient -> pending lai sau backoff (toi da max_attempts lan), con lai -> failed"""
+        def run(conn):
+            rec = conn.execute("SELECT attempts FROM jobs WHERE url = ? AND status = 'leased' AND lease_owner = ?",
+                               (url, self.owner)).fetchone()
+            if rec is None: return False
+            if transient and rec[0] < self.max_attempts:
+                conn.execute("""
+                    UPDATE jobs SET status = 'pending', lease_owner = NULL, available_at = ?, error = ?, updated_at = ?
+                    WHERE url = ?""", (time.time() + backoff_delay(rec[0]), error, now_utc(), url))
+            else:
+                conn.execute("""
+                    UPDATE jobs SET status = 'failed', lease_owner = NULL, error = ?, updated_at = ? WHERE url = ?""",
+                             (error, now_utc(), url))
+            return True
+        return self._tx(run)
+
+    def release(self):
+        """Tra lai cac URL dang giu (dung worker binh thuong, vd Ctrl+C)"""
+        def run(conn):
+            cur = conn.execute("""
+                UPDATE jobs SET status = 'pending', lease_owner = NULL, attempts = MAX(attempts - 1, 0), updated_at = ?
+                WHERE status = 'leased' AND lease_owner = ?""", (now_utc(), self.owner))
+            return cur.rowcount
+        return self._tx(run)
+
+    def unfinished(self):
+        """So URL con pending (ke ca dang backoff) hoac dang bi worker khac giu"""
+        return self.conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def stats(self):
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ("pending", "leased", "done", "failed")}
+
+    def rows(self):
+        for (row_json,) in self.conn.execute("SELECT row_json FROM jobs WHERE status = 'done' ORDER BY rowid"):
+            yield json.loads(row_json)
+
+    def errors(self):
+        return [{"url": url, "error": error, "attempts": attempts} for url, error, attempts in self.conn.execute(
+            "SELECT url, error, attempts FROM jobs WHERE status = 'failed' ORDER BY rowid")]
+
+    def close(self):
+        self.conn.close()
+
+
+class Heartbeat(threading.Thread):
+    """Gia han lease moi lease_seconds / 3 giay trong luc cao 1 batch (ket noi SQLite rieng)"""
+
+    def __init__(self, queue, urls):
+        super().__init__(daemon=True)
+        self.path, self.owner, self.lease_seconds = queue.path, queue.owner, queue.lease_seconds
+        self.max_attempts, self.wal = queue.max_attempts, queue.wal  # giu --no-wal cua queue chinh
+        self.urls = urls
+        self.stopped = threading.Event()
+
+    def run(self):
+        queue = WorkQueue(self.path, self.owner, self.lease_seconds, self.max_attempts, self.wal)
+        try:
+            while not self.stopped.wait(self.lease_seconds / 3):
+                queue.heartbeat(self.urls)
+        finally:
+            queue.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.join()
+
+
+class QueueRecorder:
+    """on_done cua engine crawl.py: row -> ghi vao queue ngay (khong giu trong RAM)"""
+    keep_rows = False
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.done = self.lost = 0
+
+    def __call__(self, url, row=None, error=None):
+        if row is None: return  # loi xu ly sau batch (can kind transient / permanent)
+        if self.queue.complete(url, row):
+            self.done += 1
+        else:
+            self.lost += 1
+
+
+# ===== WORKER =====
+def work(queue, crawl_args, batch=BATCH):
+    """Claim -> cao (engine crawl.py) -> ghi ket qua, den khi queue het viec"""
+    from archive import HtmlArchive
+    from browser import LazyDriver
+    from chrome_pool import ChromePool
+    from crawl import make_controller, make_extract, scrape_detail
+    from http_fetch import make_session
+    from state_store import StateStore
+    from waits import WaitLog
+
+    session = make_session()
+    get_driver = LazyDriver(headless=crawl_args.lean, lean=crawl_args.lean)
+    wait_log = WaitLog()
+    state = StateStore(crawl_args.state_db) if crawl_args.incremental else None
+    archive = HtmlArchive(crawl_args.archive) if crawl_args.archive else None
+    recorder = QueueRecorder(queue)
+    # Giong crawl.main: 1 controller AIMD + 1 pool Chrome (mo lazy) cho ca worker, khong tao lai moi batch
+    controller = make_controller(crawl_args)
+    pool = (ChromePool(crawl_args.workers, extract=make_extract(crawl_args, archive), lean=crawl_args.lean)
+            if crawl_args.mode in ("async", "pool") and crawl_args.workers > 1 else None)
+    n_errors = 0
+    print(f"Worker {queue.owner}: {queue.stats()}")
+    try:
+        while True:
+            urls = queue.claim(batch)
+            if not urls:
+                if not queue.unfinished(): break
+                time.sleep(POLL)  # URL con lai dang backoff hoac worker khac dang giu
+                continue
+            with Heartbeat(queue, urls):
+                _, errors, _ = scrape_detail(urls, crawl_args, session, get_driver, wait_log, state, recorder,
+                                             archive, controller, pool)
+            for err in errors:
+                queue.fail(err["url"], err["error"], err.get("kind") == TRANSIENT)
+            n_errors += len(errors)
+    finally:
+        released = queue.release()
+        if released: print(f"  Tra lai {released} URL dang giu")
+        get_driver.quit()
+        if pool is not None: pool.close()
+        if state is not None: state.close()
+        if archive is not None: archive.close()
+    print(f"Worker {queue.owner}: {recorder.done} row, loi {n_errors}, mat lease {recorder.lost}. "
+          f"Queue: {queue.stats()}")
+
+
+def main():
+    from crawl import build_parser
+
+    parser = argparse.ArgumentParser(description="Hang doi crawl dung chung (SQLite + lease)")
+    parser.add_argument("--queue", default=QUEUE_DB)
+    parser.add_argument("--no-wal", action="store_true", help="journal_mode DELETE (file tren o chia se giua nhieu may)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("enqueue", help="BUOC 1 (hoac --from file) -> queue")
+    p.add_argument("--from", dest="from_file", help="file 1 URL / dong")
+    p.add_argument("--requeue", action="store_true", help="dua ca URL da done / failed ve pending")
+    p = sub.add_parser("work", help="claim + cao den khi het viec; tham so sau -- chuyen cho crawl.py")
+    p.add_argument("--batch", type=int, default=BATCH)
+    p.add_argument("--lease", type=float, default=LEASE_SECONDS, help="giay, het han ma khong heartbeat -> tra lai")
+    sub.add_parser("stats", help="so URL theo trang thai")
+    p = sub.add_parser("export", help="row da xong -> .jsonl / .csv / .parquet")
+    p.add_argument("--output", default="vuadocau_queue.jsonl")
+    p.add_argument("--xlsx", help="chuyen them sang file xlsx")
+    args, rest = parser.parse_known_args()
+    crawl_args = build_parser().parse_args([a for a in rest if a != "--"])
+
+    queue = WorkQueue(args.queue, lease_seconds=getattr(args, "lease", LEASE_SECONDS),
+                      max_attempts=crawl_args.max_attempts, wal=not args.no_wal)
+    try:
+        if args.cmd == "enqueue":
+            from canonical import dedup_urls
+            from discovery import discover_links
+            if args.from_file:
+                with open(args.from_file, encoding="utf-8") as f:
+                    urls, _ = dedup_urls(line.strip() for line in f if line.strip())
+            else:
+                urls, _ = discover_links(crawl_args.base_url, crawl_args.concurrency, crawl_args.rate, crawl_args.limit)
+            print(f"Them {queue.enqueue(urls, args.requeue)}/{len(urls)} URL moi. Queue: {queue.stats()}")
+        elif args.cmd == "work":
+            work(queue, crawl_args, args.batch)
+        elif args.cmd == "stats":
+            print(queue.stats())
+            for err in queue.errors()[:5]: print(f"  - {err['url'][:55]}: {(err['error'] or '')[:60]}")
+        else:
+            from sinks import open_sink, to_xlsx
+            sink = open_sink(args.output)
+            try:
+                for row in queue.rows(): sink.write(row)
+            finally:
+                sink.close()
+            if args.xlsx: to_xlsx(args.output, args.xlsx)
+            print(f"{sink.count} row -> {args.output}" + (f" + {args.xlsx}" if args.xlsx else ""))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()